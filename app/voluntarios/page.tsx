@@ -19,7 +19,8 @@ export default function VoluntariosPage() {
   useEffect(() => {
     const fetchVolunteers = async () => {
       try {
-        const data = await api.volunteers.list()
+        // Only the columns this table shows
+        const data = await api.volunteers.list({ fields: "name,email,phone,city,region", include: "skills" })
         setVolunteers(data)
       } catch (error) {
         console.error("Failed to fetch volunteers", error)
@@ -1,8 +1,21 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools import FunctionTool
+from app.agents.tool_cache import read_only_tool
 from app.core.client import supabase
+from app.services.catalog import catalog
+from app.services.segment_filters import build_query
+from app.services.volunteer_index import volunteer_index
+from app.services.volunteer_lookup import fetch_volunteers_by_ids
 
+MAX_CANDIDATOS_TEXTO = 200
 
+# Seconds a read-only tool result is reused (see tool_cache)
+TTL_BUSQUEDA = 30
+TTL_METRICAS = 120
+TTL_CAMPANAS = 300
+
+
+@read_only_tool(ttl=TTL_BUSQUEDA)
 def buscar_voluntarios(
     region: str = None,
     skill: str = None,
@@ -19,28 +32,35 @@ def buscar_voluntarios(
         skill: Habilidad especifica (ej: "Primeros Auxilios", "Cocina")
         disponibilidad: Disponibilidad horaria (ej: "Lunes a Viernes", "Mananas")
         estado: Estado del voluntario. Por defecto "Activo"
-        texto_libre: Busqueda por nombre o email (usa full-text search)
+        texto_libre: Busqueda por nombre, email, region o ciudad; tolera tildes y errores de tipeo
         limite: Numero maximo de resultados. Por defecto 20.
     """
-    if texto_libre:
+    filtros = {
+        "region": region,
+        "availability": disponibilidad,
+        "status": estado,
+        "skills": [skill] if skill else []
+    }
+    columnas = "*, skills(*), campaigns(*)"
+
+    ranked = volunteer_index.search(texto_libre, limite, filtros, contains=True) if texto_libre else None
+    if ranked is not None:
+        data, _ = fetch_volunteers_by_ids([vol_id for vol_id, _ in ranked], columnas)
+    elif texto_libre:
+        # Index still loading: rank with the full-text RPC, then apply the remaining filters in the DB
         resp = supabase.rpc("buscar_voluntarios", {"termino": texto_libre}).execute()
-        data = resp.data
+        ranking = [v["id"] for v in resp.data][:MAX_CANDIDATOS_TEXTO]
+        data = build_query(filtros, columnas, contains=True).in_("id", ranking).execute().data if ranking else []
+        posicion = {vol_id: i for i, vol_id in enumerate(ranking)}
+        data = sorted(data, key=lambda v: posicion[v["id"]])[:limite]
     else:
-        q = supabase.table("volunteers").select("*, skills(*), campaigns(*)")
-        if region:
-            q = q.ilike("region", f"%{region}%")
-        if disponibilidad:
-            q = q.ilike("availability", f"%{disponibilidad}%")
-        if estado:
-            q = q.eq("status", estado)
-        resp = q.limit(limite).execute()
-        data = resp.data
-
-    if skill and data:
-        data = [
-            v for v in data
-            if any(skill.lower() in s["name"].lower() for s in v.get("skills", []))
-        ]
+        ids = volunteer_index.segment_ids(filtros, limit=limite, contains=True)
+        if ids is None:
+            data = build_query(filtros, columnas, contains=True).limit(limite).execute().data
+        elif ids:
+            data = supabase.table("volunteers").select(columnas).in_("id", ids).execute().data
+        else:
+            data = []
 
     return {
         "total": len(data),
@@ -60,6 +80,7 @@ def buscar_voluntarios(
     }
 
 
+@read_only_tool(ttl=TTL_METRICAS)
 def obtener_metricas_generales() -> dict:
     """Retorna metricas generales: total voluntarios, por region."""
     total_resp = supabase.table("volunteers").select("id", count="exact", head=True).execute()
@@ -86,10 +107,10 @@ def crear_segmento(nombre: str, filtros: dict) -> dict:
     return {"id": resp.data[0]["id"], "nombre": nombre, "filtros": filtros}
 
 
+@read_only_tool(ttl=TTL_CAMPANAS)
 def obtener_campanas() -> dict:
     """Retorna todas las campanas registradas."""
-    resp = supabase.table("campaigns").select("*").execute()
-    return {"campanas": resp.data}
+    return {"campanas": catalog.snapshot().campaigns}
 
 
 db_agent = LlmAgent(
@@ -1,7 +1,19 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools import FunctionTool
+from app.agents.tool_cache import read_only_tool
 from app.core.client import supabase
-from app.services.email_service import send_email
+from app.services.email_dispatcher import email_dispatcher
+from app.services.catalog import catalog
+from app.services.message_template import compile_template
+from app.services.volunteer_lookup import fetch_volunteers_by_ids
+
+COLUMNAS_CORREO = "id, name, email, region, availability"
+
+
+def _contexto_plantilla() -> dict:
+    # {{campaña}}: la campana mas reciente del catalogo
+    ultima = catalog.latest_campaign()
+    return {"campaign": ultima["name"] if ultima else ""}
 
 
 def previsualizar_correos(
@@ -15,26 +27,24 @@ def previsualizar_correos(
     Args:
         volunteer_ids: Lista de IDs de voluntarios
         asunto: Asunto del correo
-        mensaje_template: Plantilla con {{nombre}}, {{region}}, {{disponibilidad}}
+        mensaje_template: Plantilla con {{nombre}}, {{region}}, {{disponibilidad}}, {{email}}, {{campaña}}
     """
+    plantilla = compile_template(mensaje_template)
+    contexto = _contexto_plantilla()
+
+    voluntarios, faltantes = fetch_volunteers_by_ids(volunteer_ids[:3], COLUMNAS_CORREO)
     previews = []
-    for vol_id in volunteer_ids[:3]:
-        vol = supabase.table("volunteers").select("*").eq("id", vol_id).single().execute().data
-        if not vol:
-            continue
-        mensaje = mensaje_template \
-            .replace("{{nombre}}", vol.get("name", "Voluntario")) \
-            .replace("{{region}}", vol.get("region", "")) \
-            .replace("{{disponibilidad}}", vol.get("availability", ""))
+    for vol in voluntarios:
         previews.append({
             "nombre": vol["name"],
             "email": vol["email"],
-            "mensaje_preview": mensaje
+            "mensaje_preview": plantilla.render(vol, contexto)
         })
     return {
         "total_destinatarios": len(volunteer_ids),
         "previews": previews,
-        "nota": f"Mostrando {len(previews)} de {len(volunteer_ids)} destinatarios"
+        "nota": f"Mostrando {len(previews)} de {len(volunteer_ids)} destinatarios",
+        "ids_no_encontrados": faltantes or None
     }
 
 
@@ -49,24 +59,37 @@ def enviar_correos(
     Args:
         volunteer_ids: Lista de IDs de voluntarios
         asunto: Asunto del correo
-        mensaje_template: Cuerpo con {{nombre}}, {{region}}, {{disponibilidad}}
+        mensaje_template: Cuerpo con {{nombre}}, {{region}}, {{disponibilidad}}, {{email}}, {{campaña}}
     """
-    enviados = 0
+    plantilla = compile_template(mensaje_template)
+    plantilla_asunto = compile_template(asunto)
+    contexto = _contexto_plantilla()
+
+    mensajes = []
     errores = []
 
-    for vol_id in volunteer_ids:
-        try:
-            vol = supabase.table("volunteers").select("*").eq("id", vol_id).single().execute().data
-            if not vol or not vol.get("email"):
-                continue
-            mensaje = mensaje_template \
-                .replace("{{nombre}}", vol.get("name", "Voluntario")) \
-                .replace("{{region}}", vol.get("region", "")) \
-                .replace("{{disponibilidad}}", vol.get("availability", ""))
-            send_email(vol["email"], asunto, mensaje)
-            enviados += 1
-        except Exception as e:
-            errores.append(f"{vol_id}: {str(e)}")
+    try:
+        voluntarios, faltantes = fetch_volunteers_by_ids(volunteer_ids, COLUMNAS_CORREO)
+    except Exception as e:
+        voluntarios, faltantes = [], []
+        errores.append(str(e))
+
+    errores.extend(f"{vol_id}: voluntario no encontrado" for vol_id in faltantes)
+
+    for vol in voluntarios:
+        if not vol.get("email"):
+            errores.append(f"{vol['id']}: voluntario sin email")
+            continue
+        mensajes.append((vol["email"], plantilla_asunto.render(vol, contexto), plantilla.render(vol, contexto)))
+
+    try:
+        resultados = email_dispatcher.send_batch(mensajes)
+    except Exception as e:
+        resultados = []
+        errores.append(str(e))
+
+    enviados = sum(1 for r in resultados if r["status"] == "sent")
+    errores.extend(f"{r['email']}: {r['error']}" for r in resultados if r["status"] != "sent")
 
     supabase.table("logs").insert({
         "source": "AGENT",
@@ -75,9 +98,15 @@ def enviar_correos(
         "details": {"volunteer_ids": volunteer_ids, "enviados": enviados, "errores": errores}
     }).execute()
 
-    return {"enviados": enviados, "total": len(volunteer_ids), "errores": errores or None}
+    return {
+        "enviados": enviados,
+        "total": len(volunteer_ids),
+        "errores": errores or None,
+        "resultados": resultados
+    }
 
 
+@read_only_tool(ttl=3600)
 def obtener_plantillas() -> dict:
     """Retorna plantillas de correo predefinidas."""
     return {
@@ -0,0 +1,108 @@
+"""
+TTL memoization for read-only agent tools.
+
+The LLM often calls the same lookup several times in one turn. Tools decorated
+with ``read_only_tool(ttl=...)`` declare that they have no side effects, so a
+call with the same (normalized) arguments within ``ttl`` seconds is answered
+from memory. Arguments are bound against the signature with defaults applied,
+so ``f(region="Biobio")`` and ``f("Biobio")`` share an entry; strings are
+stripped of surrounding whitespace and dicts are compared independent of key
+order.
+
+``functools.wraps`` keeps the name, docstring and signature that ADK's
+``FunctionTool`` reads to build the tool declaration. Results carrying an
+``"error"`` key and raised exceptions are never cached.
+"""
+import copy
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+MAX_ENTRIES_PER_TOOL = 128
+
+_registry = {}  # tool name -> _ToolCache
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class _ToolCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"ttl": self.ttl, "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def read_only_tool(ttl: float = 60, max_entries: int = MAX_ENTRIES_PER_TOOL):
+    """Memoize a side-effect-free tool for ``ttl`` seconds per normalized argument set."""
+    def decorator(f):
+        signature = inspect.signature(f)
+        cache = _registry[f.__name__] = _ToolCache(ttl, max_entries)
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = json.dumps(_normalize(bound.arguments), sort_keys=True, default=str)
+
+            found, result = cache.get(key)
+            if not found:
+                result = f(*args, **kwargs)
+                if isinstance(result, dict) and result.get("error"):
+                    return result
+                cache.put(key, result)
+            # Callers (ADK, the LLM response builder) may mutate what they get
+            return copy.deepcopy(result)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def tool_cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+def clear_tool_caches():
+    for cache in _registry.values():
+        cache.clear()
@@ -1,12 +1,15 @@
-from flask import Blueprint, request, jsonify
+import json
+import uuid
+from flask import Blueprint, g, request, jsonify, Response, stream_with_context
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
 from app.agents.orchestrator import orchestrator
+from app.agents.tool_cache import tool_cache_stats
 from app.core.security import require_role
+from app.services.session_store import session_service
 
 assistant_bp = Blueprint("assistant", __name__)
-session_service = InMemorySessionService()
 runner = Runner(
     agent=orchestrator,
     app_name="botathon_assistant",
@@ -14,12 +17,22 @@ runner = Runner(
     auto_create_session=True
 )
 
+def _session_owner() -> str:
+    # Sessions are scoped per authenticated user
+    user = g.current_user
+    return str(user.get("id") or user.get("sub"))
+
+def _session_id(data) -> str:
+    # No shared "default" session: a new conversation gets its own id
+    return str(data.get("session_id") or "").strip() or str(uuid.uuid4())
+
 @assistant_bp.route("/chat", methods=["POST"])
 @require_role("coordinator")
 def chat():
     data = request.json
     message = data.get("message", "").strip()
-    session_id = data.get("session_id", "default")
+    session_id = _session_id(data)
+    user_id = _session_owner()
 
     if not message:
         return jsonify({"error": "El mensaje no puede estar vacio"}), 400
@@ -29,7 +42,7 @@ def chat():
         response_text = ""
 
         for event in runner.run(
-            user_id="coordinator",
+            user_id=user_id,
             session_id=session_id,
             new_message=content
         ):
@@ -42,3 +55,83 @@ def chat():
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+# Progress messages shown while a tool runs
+TOOL_LABELS = {
+    "buscar_voluntarios": "Buscando voluntarios…",
+    "obtener_metricas_generales": "Calculando metricas…",
+    "crear_segmento": "Creando segmento…",
+    "obtener_campanas": "Consultando campanas…",
+    "previsualizar_correos": "Preparando vista previa de correos…",
+    "enviar_correos": "Enviando correos…",
+    "obtener_plantillas": "Cargando plantillas…",
+}
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _tool_label(call) -> str:
+    if call.name == "transfer_to_agent":
+        return f"Derivando a {(call.args or {}).get('agent_name', 'otro agente')}…"
+    return TOOL_LABELS.get(call.name, f"Ejecutando {call.name}…")
+
+@assistant_bp.route("/chat/stream", methods=["POST"])
+@require_role("coordinator")
+def chat_stream():
+    """
+    Same as /chat, streamed as Server-Sent Events:
+      delta  {"text"}                 partial model output, as it is generated
+      tool   {"name", "label", "agent"} a tool or sub-agent was invoked
+      final  {"response", "session_id"} the complete reply
+      error  {"error"}
+    """
+    data = request.json
+    message = data.get("message", "").strip()
+    session_id = _session_id(data)
+    user_id = _session_owner()
+
+    if not message:
+        return jsonify({"error": "El mensaje no puede estar vacio"}), 400
+
+    content = types.Content(role="user", parts=[types.Part(text=message)])
+
+    def generate():
+        response_text = ""
+        try:
+            for event in runner.run(
+                user_id=user_id,
+                session_id=session_id,
+                new_message=content,
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE)
+            ):
+                for call in event.get_function_calls():
+                    yield _sse("tool", {"name": call.name, "label": _tool_label(call), "agent": event.author})
+
+                if not event.content or not event.content.parts:
+                    continue
+                text = "".join(part.text for part in event.content.parts if part.text)
+                if not text:
+                    continue
+                if event.partial:
+                    yield _sse("delta", {"text": text})
+                elif event.is_final_response():
+                    # Aggregated text of the chunks already streamed (or the whole reply
+                    # if the model did not stream)
+                    response_text += text
+
+            yield _sse("final", {"response": response_text, "session_id": session_id})
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        # no-cache + no proxy buffering so every event reaches the browser immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@assistant_bp.route("/stats", methods=["GET"])
+@require_role("admin")
+def assistant_stats():
+    """Tool memoization and session cache counters for this worker."""
+    return jsonify({"tools": tool_cache_stats(), "sessions": session_service.stats()})
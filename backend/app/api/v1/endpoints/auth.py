@@ -4,12 +4,11 @@ from app.core.client import supabase
 from app.core.security import (
     AUTH_COOKIE_NAME,
     REFRESH_COOKIE_NAME,
-    get_password_hash,
-    verify_password,
     create_access_token,
     create_refresh_token,
     decode_token,
 )
+from app.core.hashing import HashingBusy, password_hasher
 from app.schemas.auth import UserCreate, UserLogin, UserResponse, Token
 from pydantic import ValidationError
 
@@ -52,7 +51,7 @@ def register():
             return jsonify({"error": "Email already registered"}), 400
             
         # Hash password
-        hashed_pw = get_password_hash(user_in.password)
+        hashed_pw = password_hasher.hash(user_in.password)
         
         # Create user
         user_data = {
@@ -72,6 +71,8 @@ def register():
         
     except ValidationError as e:
         return jsonify({"error": e.errors()}), 422
+    except HashingBusy:
+        return jsonify({"error": "Server busy, please retry"}), 503, {"Retry-After": "1"}
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -89,8 +90,16 @@ def login():
         user = response.data[0]
         
         # Verify password
-        if not verify_password(login_in.password, user["password_hash"]):
+        valid, new_hash = password_hasher.verify_and_update(login_in.password, user["password_hash"])
+        if not valid:
             return jsonify({"error": "Invalid credentials"}), 401
+
+        # Hash cost changed since this password was stored: upgrade it now
+        if new_hash:
+            try:
+                supabase.table("users").update({"password_hash": new_hash}).eq("id", user["id"]).execute()
+            except Exception as e:
+                print(f"Password rehash for user {user['id']} failed: {e}")
             
         # Create tokens
         access_token = create_access_token(data={"sub": user["email"], "role": user["role"], "id": user["id"]})
@@ -109,6 +118,8 @@ def login():
         
     except ValidationError as e:
         return jsonify({"error": e.errors()}), 422
+    except HashingBusy:
+        return jsonify({"error": "Server busy, please retry"}), 503, {"Retry-After": "1"}
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -1,10 +1,22 @@
 from flask import Blueprint, request, jsonify
 from app.core.client import supabase
 from app.core.config import settings
+from app.services.task_signal import task_signal
+from datetime import datetime, timedelta, timezone
 from functools import wraps
+import threading
+import time
 
 bots_bp = Blueprint("bots", __name__)
 
+DEFAULT_LEASE_SECONDS = 300
+MAX_LEASE_SECONDS = 3600
+MAX_CLAIM_BATCH = 50
+MAX_WAIT_SECONDS = 25  # stays below gunicorn's 30s timeout
+MAX_WAITERS = 8  # long-polls parked per worker; half of run.sh's 16 gthread threads
+
+_waiters = threading.BoundedSemaphore(MAX_WAITERS)
+
 def require_api_key(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -14,40 +26,119 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def claim_tasks(limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """
+    Atomically lease up to ``limit`` pending (or lease-expired) tasks for the
+    calling bot. ``lease_seconds=None`` takes them without an expiring lease,
+    so they are never handed to another bot.
+    """
+    response = supabase.rpc("claim_tasks", {
+        "p_bot_id": request.headers.get("X-Bot-ID"),
+        "p_limit": limit,
+        "p_lease_seconds": lease_seconds
+    }).execute()
+    return sorted(response.data, key=lambda t: t.get("created_at") or "")
+
+def _wait_seconds():
+    """Parse the optional ``wait`` query parameter (long-poll timeout)."""
+    return max(0.0, min(float(request.args.get("wait", 0)), MAX_WAIT_SECONDS))
+
+def claim_tasks_waiting(limit=1, lease_seconds=DEFAULT_LEASE_SECONDS, wait=0.0):
+    """
+    Like claim_tasks, but if nothing is pending hold the request for up to
+    ``wait`` seconds and retry only when a new task is signalled. When
+    MAX_WAITERS requests are already parked on this worker, answer right away
+    so long-polls can't take every thread from the dashboard.
+    """
+    if wait <= 0 or not _waiters.acquire(blocking=False):
+        return claim_tasks(limit, lease_seconds)
+    try:
+        deadline = time.monotonic() + wait
+        while True:
+            token = task_signal.token()
+            tasks = claim_tasks(limit, lease_seconds)
+            remaining = deadline - time.monotonic()
+            if tasks or remaining <= 0:
+                return tasks
+            if not task_signal.wait(token, remaining):
+                return []
+    finally:
+        _waiters.release()
+
 @bots_bp.route("/pending-tasks", methods=["GET"])
 @require_api_key
 def get_pending_tasks():
     """
     Get next pending task for a bot to process.
     This endpoint is designed for Blue Prism bots to poll.
+    Pass ?wait=<seconds> (max 25) to long-poll instead of polling in a loop.
+    Tasks taken here have no expiring lease: these bots never call /renew.
     """
     try:
-        # Find oldest pending task
-        response = supabase.table("tasks")\
-            .select("*")\
-            .eq("status", "pending")\
-            .order("created_at")\
-            .limit(1)\
-            .execute()
-            
-        tasks = response.data
+        tasks = claim_tasks_waiting(limit=1, lease_seconds=None, wait=_wait_seconds())
         
         if not tasks:
             return jsonify({"message": "No pending tasks"}), 200
             
-        task = tasks[0]
+        return jsonify(tasks[0])
+    except ValueError:
+        return jsonify({"error": "wait must be a number"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bots_bp.route("/claim", methods=["POST"])
+@require_api_key
+def claim():
+    """
+    Lease a batch of tasks in a single round trip.
+    Body (optional): { "limit": 10, "lease_seconds": 300 }
+    Query (optional): ?wait=<seconds> to long-poll when the queue is empty.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        limit = int(data.get("limit", request.args.get("limit", 1)))
+        lease_seconds = int(data.get("lease_seconds", request.args.get("lease_seconds", DEFAULT_LEASE_SECONDS)))
         
-        # Lock task for this bot (optimistic locking or simple status update)
-        # For simplicity, we just mark it as PROCESSING immediately
-        update_data = {"status": "processing"}
+        if not 1 <= limit <= MAX_CLAIM_BATCH:
+            return jsonify({"error": f"limit must be between 1 and {MAX_CLAIM_BATCH}"}), 400
+        if not 1 <= lease_seconds <= MAX_LEASE_SECONDS:
+            return jsonify({"error": f"lease_seconds must be between 1 and {MAX_LEASE_SECONDS}"}), 400
+            
+        return jsonify({"tasks": claim_tasks_waiting(limit, lease_seconds, _wait_seconds())})
+    except ValueError:
+        return jsonify({"error": "limit, lease_seconds and wait must be numbers"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bots_bp.route("/task/<int:task_id>/renew", methods=["POST"])
+@require_api_key
+def renew_lease(task_id):
+    """
+    Extend the lease of a task the bot is still working on.
+    Body (optional): { "lease_seconds": 300 }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        lease_seconds = int(data.get("lease_seconds", DEFAULT_LEASE_SECONDS))
+        if not 1 <= lease_seconds <= MAX_LEASE_SECONDS:
+            return jsonify({"error": f"lease_seconds must be between 1 and {MAX_LEASE_SECONDS}"}), 400
+
+        expires = datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+        query = supabase.table("tasks")\
+            .update({"lease_expires_at": expires.isoformat()})\
+            .eq("id", task_id)\
+            .eq("status", "processing")
         bot_id = request.headers.get("X-Bot-ID")
         if bot_id:
-            update_data["bot_id"] = bot_id
-            
-        upd_response = supabase.table("tasks").update(update_data).eq("id", task["id"]).execute()
-        updated_task = upd_response.data[0]
+            query = query.eq("bot_id", bot_id)
+        response = query.execute()
         
-        return jsonify(updated_task)
+        if not response.data:
+            return jsonify({"error": "Task not found or lease lost"}), 404
+            
+        return jsonify(response.data[0])
+    except ValueError:
+        return jsonify({"error": "lease_seconds must be an integer"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -56,6 +147,8 @@ def get_pending_tasks():
 def complete_task(task_id):
     """
     Mark a task as completed or failed.
+    Only a task still in processing can be completed; with X-Bot-ID, only by
+    the bot holding it, so a bot whose lease was reclaimed gets 404.
     """
     try:
         data = request.json
@@ -71,10 +164,18 @@ def complete_task(task_id):
         if not update_data:
              return jsonify({"error": "No data to update"}), 400
 
-        response = supabase.table("tasks").update(update_data).eq("id", task_id).execute()
+        update_data["lease_expires_at"] = None
+        query = supabase.table("tasks")\
+            .update(update_data)\
+            .eq("id", task_id)\
+            .eq("status", "processing")
+        bot_id = request.headers.get("X-Bot-ID")
+        if bot_id:
+            query = query.eq("bot_id", bot_id)
+        response = query.execute()
         
         if not response.data:
-            return jsonify({"error": "Task not found"}), 404
+            return jsonify({"error": "Task not found or lease lost"}), 404
             
         return jsonify(response.data[0])
     except Exception as e:
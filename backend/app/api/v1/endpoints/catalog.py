@@ -0,0 +1,18 @@
+from flask import Blueprint, jsonify
+from app.core.cache import conditional_response
+from app.core.security import require_role
+from app.services.catalog import catalog
+
+catalog_bp = Blueprint("catalog", __name__)
+
+CATALOG_MAX_AGE = 300  # seconds the browser may reuse the catalog without revalidating
+
+@catalog_bp.route("/", methods=["GET"])
+@require_role(("coordinator", "worker"))
+def get_catalog():
+    """All skills and campaigns. Send If-None-Match to get a 304 when nothing changed."""
+    try:
+        snapshot = catalog.snapshot()
+        return conditional_response(snapshot.body, "application/json", CATALOG_MAX_AGE, snapshot.etag)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
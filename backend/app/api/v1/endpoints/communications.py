@@ -1,36 +1,59 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from app.core.client import supabase
+from app.core.config import settings
 from app.core.security import require_role
+from app.services.catalog import catalog
+from app.services.message_template import compile_template
+from app.services.segment_filters import build_query
+from app.services.volunteer_index import volunteer_index
+from app.services.volunteer_lookup import fetch_volunteers_by_ids
 import csv
 import io
 
 communications_bp = Blueprint("communications", __name__)
 
-def apply_filters(query, filters):
-    """Helper to apply filters to a Supabase query."""
-    if not filters:
-        return query
-    
-    if "search" in filters and filters["search"]:
-        query = query.or_(f"name.ilike.%{filters['search']}%,email.ilike.%{filters['search']}%")
-    
-    if "region" in filters and filters["region"] and filters["region"] != "all":
-        query = query.eq("region", filters["region"])
-        
-    if "availability" in filters and filters["availability"]:
-        query = query.eq("availability", filters["availability"])
-        
-    if "volunteer_type" in filters and filters["volunteer_type"]:
-        query = query.eq("volunteer_type", filters["volunteer_type"])
-        
-    if "status" in filters and filters["status"]:
-        query = query.eq("status", filters["status"])
+EXPORT_COLUMNS = "id, name, email, region, availability"
+
+def template_context(filters) -> dict:
+    """Send-wide template values: {{campaña}} is the segment's campaign, else the latest one."""
+    campaign = (filters or {}).get("campaign")
+    if not campaign or campaign == "all":
+        latest = catalog.latest_campaign()
+        campaign = latest["name"] if latest else ""
+    return {"campaign": campaign}
+
+def fetch_segment_volunteers(filters, limit=None):
+    """
+    Resolve the volunteers of a segment. The in-process index answers the
+    full filter and only matching rows are fetched; while it is warming up
+    the same filter is compiled into a single PostgREST query instead.
+    """
+    ids = volunteer_index.segment_ids(filters, limit)
+    if ids is None:
+        query = build_query(filters)
+        if limit:
+            query = query.limit(limit)
+        return query.execute().data
+
+    volunteers, _ = fetch_volunteers_by_ids(ids)
+    return volunteers
 
-    # Note: Complex filters (skills/campaigns) are skipped here for simplicity in communications
-    # as they require fetching relations and filtering in memory, which is expensive for bulk ops.
-    # Ideally, we'd use the IDs stored in the segment if we stored them, or duplicate the logic.
-    # For now, we rely on basic filters.
-    return query
+def iter_segment_pages(filters, columns="*", page_size=settings.SUPABASE_MAX_ROWS):
+    """
+    Yield the members of a segment page by page using keyset pagination
+    (id > last_id), so there is no row cap and deep pages stay cheap.
+    """
+    last_id = None
+    while True:
+        query = build_query(filters, columns).order("id").limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = query.execute().data
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"]
 
 @communications_bp.route("/simular", methods=["POST"])
 @require_role("coordinator")
@@ -47,6 +70,8 @@ def simulate_communication():
         
         if not template:
             return jsonify({"error": "Template content is required"}), 400
+
+        message_template = compile_template(template, "Volunteer")
         
         # Get Segment
         seg_response = supabase.table("segments").select("*").eq("id", segment_id).single().execute()
@@ -56,29 +81,15 @@ def simulate_communication():
             return jsonify({"error": "Segment not found"}), 404
             
         # Get Volunteers (Preview 5)
-        query = supabase.table("volunteers").select("*")
-        query = apply_filters(query, segment.get("filters"))
-        query = query.limit(5)
-        
-        vol_response = query.execute()
-        volunteers = vol_response.data
+        volunteers = fetch_segment_volunteers(segment.get("filters"), limit=5)
+        context = template_context(segment.get("filters"))
         
         previews = []
         for v in volunteers:
-            name = v.get("name", "Volunteer")
-            email = v.get("email", "")
-            region = v.get("region", "")
-            availability = v.get("availability", "")
-            
-            msg = template.replace("{{nombre}}", name)\
-                          .replace("{{email}}", email)\
-                          .replace("{{region}}", region)\
-                          .replace("{{disponibilidad}}", availability)
-                          
             previews.append({
-                "volunteer": name,
-                "email": email,
-                "message": msg
+                "volunteer": v.get("name") or "Volunteer",
+                "email": v.get("email") or "",
+                "message": message_template.render(v, context)
             })
             
         return jsonify(previews)
@@ -90,6 +101,8 @@ def simulate_communication():
 def generate_csv(segment_id):
     try:
         template = request.args.get("template", "") or request.args.get("content", "")
+
+        message_template = compile_template(template, "Volunteer")
         
         # Get Segment
         seg_response = supabase.table("segments").select("*").eq("id", segment_id).single().execute()
@@ -98,40 +111,51 @@ def generate_csv(segment_id):
         if not segment:
             return jsonify({"error": "Segment not found"}), 404
             
-        # Get Volunteers (All)
-        query = supabase.table("volunteers").select("*")
-        query = apply_filters(query, segment.get("filters"))
-        query = query.limit(10000) 
-        
-        vol_response = query.execute()
-        volunteers = vol_response.data
-        
-        # Generate CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["Name", "Email", "Region", "Message"])
-        
-        for v in volunteers:
-            name = v.get("name", "Volunteer")
-            email = v.get("email", "")
-            region = v.get("region", "")
-            availability = v.get("availability", "")
-            
-            msg = template.replace("{{nombre}}", name)\
-                          .replace("{{email}}", email)\
-                          .replace("{{region}}", region)\
-                          .replace("{{disponibilidad}}", availability)
-            writer.writerow([name, email, region, msg])
-            
+        filters = segment.get("filters")
+        context = template_context(filters)
+
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(["Name", "Email", "Region", "Message"])
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+
+            try:
+                for page in iter_segment_pages(filters, EXPORT_COLUMNS):
+                    for v in page:
+                        writer.writerow([
+                            v.get("name") or "Volunteer",
+                            v.get("email") or "",
+                            v.get("region") or "",
+                            message_template.render(v, context)
+                        ])
+
+                    # Flush one rendered page at a time so memory stays flat
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate(0)
+            except Exception as e:
+                # The 200 is already sent: mark the file as incomplete, then
+                # re-raise so the chunked response is aborted instead of ended
+                print(f"CSV export for segment {segment_id} aborted: {e}")
+                output.seek(0)
+                output.truncate(0)
+                writer.writerow(["ERROR", "", "", f"Export aborted, the file is incomplete: {e}"])
+                yield output.getvalue()
+                raise
+
         return Response(
-            output.getvalue(),
+            stream_with_context(generate()),
             mimetype="text/csv",
             headers={"Content-disposition": f"attachment; filename=segment_{segment_id}.csv"}
         )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-from app.services.email_service import send_email
+from app.services.email_service import get_email_config, get_gmail_credentials
+from app.services.email_dispatcher import email_dispatcher
 
 @communications_bp.route("/enviar", methods=["POST"])
 @require_role("coordinator")
@@ -148,6 +172,9 @@ def send_communications():
         
         if not template:
             return jsonify({"error": "Template content is required"}), 400
+
+        message_template = compile_template(template)
+        subject_template = compile_template(subject)
         
         # Get Segment
         seg_response = supabase.table("segments").select("*").eq("id", segment_id).single().execute()
@@ -156,48 +183,53 @@ def send_communications():
         if not segment:
             return jsonify({"error": "Segment not found"}), 404
             
-        # Get Volunteers
-        query = supabase.table("volunteers").select("*")
-        query = apply_filters(query, segment.get("filters"))
-        query = query.limit(50)
-        
-        vol_response = query.execute()
-        volunteers = vol_response.data
-        
-        sent_count = 0
-        errors = []
-        
-        for v in volunteers:
-            name = v.get("name", "Voluntario")
-            email = v.get("email")
-            region = v.get("region", "")
-            availability = v.get("availability", "")
-            
-            if not email:
-                continue
-                
-            msg_body = template.replace("{{nombre}}", name)\
-                               .replace("{{email}}", email)\
-                               .replace("{{region}}", region)\
-                               .replace("{{disponibilidad}}", availability)
+        # Fail fast on missing Gmail credentials; the batch reuses this config
+        config = get_email_config()
+        get_gmail_credentials(config)
+
+        filters = segment.get("filters")
+        context = template_context(filters)
+
+        def build_messages():
+            messages = []
+            for page in iter_segment_pages(filters, EXPORT_COLUMNS):
+                for v in page:
+                    if v.get("email"):
+                        messages.append((
+                            v["email"],
+                            subject_template.render(v, context),
+                            message_template.render(v, context),
+                        ))
+            return messages
+
+        def on_complete(results):
+            sent_count = sum(1 for r in results if r["status"] == "sent")
+            failed = [r for r in results if r["status"] != "sent"]
             
-            try:
-                send_email(email, subject, msg_body)
-                sent_count += 1
-            except Exception as e:
-                errors.append(f"Failed to send to {email}: {str(e)}")
-                
-        # Log the bulk action
-        supabase.table("logs").insert({
-            "source": "BOT",
-            "level": "INFO",
-            "message": f"Sent {sent_count} emails to segment {segment_id}",
-            "details": {"errors": errors}
-        }).execute()
+            # Log the bulk action
+            supabase.table("logs").insert({
+                "source": "BOT",
+                "level": "INFO" if not failed else "WARNING",
+                "message": f"Sent {sent_count} of {len(results)} emails to segment {segment_id}",
+                "details": {
+                    "errors": [f"Failed to send to {r['email']}: {r['error']}" for r in failed],
+                    "failed": failed
+                }
+            }).execute()
+
+        def on_error(e):
+            supabase.table("logs").insert({
+                "source": "BOT",
+                "level": "ERROR",
+                "message": f"Bulk send to segment {segment_id} failed",
+                "details": {"error": str(e)}
+            }).execute()
+
+        email_dispatcher.send_batch_in_background(build_messages, on_complete, on_error, config)
         
         return jsonify({
-            "message": f"Enviados {sent_count} correos.",
-            "errors": errors
-        })
+            "message": f"Envio en curso para el segmento {segment_id}. El resultado quedara registrado en los logs.",
+            "errors": []
+        }), 202
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
-from app.core.client import supabase
 from app.core.security import require_role
+from app.services.config_store import config_store
 
 config_bp = Blueprint("config", __name__)
 
@@ -15,13 +15,13 @@ def _is_secret_key(key: str) -> bool:
 def get_config():
     """Get all system configurations."""
     try:
-        response = supabase.table("configurations").select("*").execute()
-        data = response.data
+        # Admins expect to see the latest values, so refresh the snapshot
+        data = config_store.reload()
         
-        # Convert list of kv pairs to a single dict
+        # Mask secrets
         config_dict = {
-            item["key"]: ("********" if _is_secret_key(item["key"]) and item["value"] else item["value"])
-            for item in data
+            key: ("********" if _is_secret_key(key) and value else value)
+            for key, value in data.items()
         }
         return jsonify(config_dict)
     except Exception as e:
@@ -34,19 +34,11 @@ def update_config():
     try:
         data = request.get_json()
         
-        updated_configs = []
-        for key, value in data.items():
-            if value == "********":
-                continue
-
-            # Upsert each key-value pair
-            response = supabase.table("configurations").upsert({
-                "key": key,
-                "value": str(value),
-                "updated_at": "now()"
-            }).execute()
-            if response.data:
-                updated_configs.append(response.data[0])
+        # Masked secrets come back unchanged from the UI; don't overwrite them
+        changes = {key: value for key, value in data.items() if value != "********"}
+        
+        # Single bulk upsert; also invalidates this worker's config snapshot
+        updated_configs = config_store.upsert_many(changes)
                 
         return jsonify(updated_configs)
     except Exception as e:
@@ -1,34 +1,31 @@
-from flask import Blueprint, jsonify
-from app.core.client import supabase
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from app.core.cache import cached_response
+from app.core.client import connection_stats, supabase
 from app.core.security import require_role
 
 metrics_bp = Blueprint("metrics", __name__)
 
+TIMELINE_GRANULARITIES = ("day", "week", "month")
+METRICS_CACHE_TTL = 60  # seconds; stale data is served for a while longer while refreshing
+
 @metrics_bp.route("/overview", methods=["GET"])
 @require_role("admin")
+@cached_response(ttl=METRICS_CACHE_TTL)
 def get_overview():
     """Get high-level metrics for the dashboard."""
     try:
-        # Total Volunteers
-        print("Fetching total volunteers...")
-        volunteers_response = supabase.table("volunteers").select("id", count="exact").execute()
-        total_volunteers = volunteers_response.count
-        print(f"Total volunteers: {total_volunteers}")
-
-        # Active Campaigns (assuming we count all for now, or filter by status if added later)
-        print("Fetching active campaigns...")
-        campaigns_response = supabase.table("campaigns").select("id", count="exact").execute()
-        active_campaigns = campaigns_response.count
-        print(f"Active campaigns: {active_campaigns}")
+        # One RPC computes every total in the database
+        response = supabase.rpc("get_metrics_overview").execute()
+        totals = response.data[0] if response.data else {}
 
         # Messages Sent (from logs or a future messages table)
-        # For now, using a placeholder or counting logs of type 'communication'
-        # logs_response = supabase.table("logs").select("id", count="exact").eq("source", "communication").execute()
-        messages_sent = 0 # logs_response.count
+        messages_sent = 0
         
         return jsonify({
-            "total_volunteers": total_volunteers,
-            "active_campaigns": active_campaigns,
+            "total_volunteers": totals.get("total_volunteers", 0),
+            "active_volunteers": totals.get("active_volunteers", 0),
+            "active_campaigns": totals.get("active_campaigns", 0),
             "messages_sent": messages_sent,
             "avg_engagement": 85  # Placeholder
         })
@@ -40,6 +37,7 @@ def get_overview():
 
 @metrics_bp.route("/regions", methods=["GET"])
 @require_role("admin")
+@cached_response(ttl=METRICS_CACHE_TTL)
 def get_regions():
     """Get volunteer distribution by region."""
     try:
@@ -51,59 +49,52 @@ def get_regions():
 
 @metrics_bp.route("/skills", methods=["GET"])
 @require_role("admin")
+@cached_response(ttl=METRICS_CACHE_TTL)
 def get_top_skills():
     """Get top skills among volunteers."""
     try:
-        # Optimized approach: Fetch counts from volunteer_skills and names from skills
-        # 1. Fetch all skill_ids from junction table
-        vs_response = supabase.table("volunteer_skills").select("skill_id").execute()
-        
-        # 2. Count occurrences
-        from collections import Counter
-        skill_counts = Counter(row["skill_id"] for row in vs_response.data)
-        
-        if not skill_counts:
-            return jsonify([])
-
-        # 3. Fetch skill names for the top skills
-        top_skill_ids = [s[0] for s in skill_counts.most_common(5)]
-        
-        # If no skills found, return empty
-        if not top_skill_ids:
-             return jsonify([])
+        limit = min(int(request.args.get("limit", 5)), 50)
 
-        skills_response = supabase.table("skills").select("id, name").in_("id", top_skill_ids).execute()
-        skill_map = {s["id"]: s["name"] for s in skills_response.data}
-        
-        # 4. Format result
-        result = [
-            {"skill": skill_map.get(skill_id, "Unknown"), "count": count}
-            for skill_id, count in skill_counts.most_common(5)
-            if skill_id in skill_map
-        ]
+        # The GROUP BY runs in the database; only the top rows come back
+        response = supabase.rpc("get_top_skills", {"limite": limit}).execute()
+        result = [{"skill": r["skill"], "count": r["total"]} for r in response.data]
         
         return jsonify(result)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
     except Exception as e:
-        # Fallback if volunteer_skills table is not accessible directly
-        print(f"Error in optimized skills fetch: {e}")
         return jsonify({"error": str(e)}), 500
 
 @metrics_bp.route("/timeline", methods=["GET"])
 @require_role("admin")
+@cached_response(ttl=METRICS_CACHE_TTL)
 def get_timeline():
-    """Get volunteer growth over time."""
+    """
+    Get volunteer growth over time.
+    Query: granularity=day|week|month (default month), from/to as ISO dates (to is exclusive).
+    """
     try:
-        # Fetch creation dates
-        response = supabase.table("volunteers").select("created_at").order("created_at").execute()
-        data = response.data
-        
-        # Aggregate by month (simple string manipulation)
-        timeline = {}
-        for row in data:
-            date_str = row["created_at"][:7] # YYYY-MM
-            timeline[date_str] = timeline.get(date_str, 0) + 1
-            
-        result = [{"date": k, "count": v} for k, v in sorted(timeline.items())]
+        granularity = request.args.get("granularity", "month")
+        if granularity not in TIMELINE_GRANULARITIES:
+            return jsonify({"error": f"granularity must be one of {', '.join(TIMELINE_GRANULARITIES)}"}), 400
+
+        params = {"granularidad": granularity, "desde": None, "hasta": None}
+        for arg, param in (("from", "desde"), ("to", "hasta")):
+            value = request.args.get(arg)
+            if value:
+                try:
+                    params[param] = datetime.fromisoformat(value).isoformat()
+                except ValueError:
+                    return jsonify({"error": f"'{arg}' must be an ISO date"}), 400
+
+        response = supabase.rpc("get_volunteer_timeline", params).execute()
+        result = [{"date": r["bucket"], "count": r["total"]} for r in response.data]
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@metrics_bp.route("/connections", methods=["GET"])
+@require_role("admin")
+def get_connection_stats():
+    """Supabase HTTP connection reuse for the worker that serves this request."""
+    return jsonify(connection_stats.snapshot())
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from app.core.client import supabase
 from app.core.security import require_role
 from app.schemas.segment import SegmentCreate, SegmentResponse
+from app.services.segment_filters import count_matching
+from app.services.volunteer_index import volunteer_index
 
 segmentation_bp = Blueprint("segmentation", __name__)
 
@@ -14,50 +16,9 @@ def create_segment():
         segment_in = SegmentCreate(**data)
         filters = segment_in.filters
         
-        # Base query for fetching data
-        query = supabase.table("volunteers").select("id, skills(name), campaigns(name), region, availability, volunteer_type, status")
-        
-        # Apply basic filters
-        if "search" in filters and filters["search"]:
-             query = query.or_(f"name.ilike.%{filters['search']}%,email.ilike.%{filters['search']}%")
-        
-        if "region" in filters and filters["region"] and filters["region"] != "all":
-            query = query.eq("region", filters["region"])
-            
-        if "availability" in filters and filters["availability"]:
-            query = query.eq("availability", filters["availability"])
-            
-        if "volunteer_type" in filters and filters["volunteer_type"]:
-            query = query.eq("volunteer_type", filters["volunteer_type"])
-            
-        if "status" in filters and filters["status"]:
-            query = query.eq("status", filters["status"])
-
-        # Execute query to get candidates
-        response = query.execute()
-        candidates = response.data
-        
-        # Apply complex filters in Python (Skills, Campaigns)
-        filtered_data = []
-        for volunteer in candidates:
-            match = True
-            
-            # Filter by skills
-            if "skills" in filters and filters["skills"]:
-                v_skills = [s["name"] for s in volunteer.get("skills", [])]
-                if not all(skill in v_skills for skill in filters["skills"]):
-                    match = False
-            
-            # Filter by campaign
-            if match and "campaign" in filters and filters["campaign"] and filters["campaign"] != "all":
-                v_campaigns = [c["name"] for c in volunteer.get("campaigns", [])]
-                if filters["campaign"] not in v_campaigns:
-                    match = False
-            
-            if match:
-                filtered_data.append(volunteer)
-                
-        count = len(filtered_data)
+        count = volunteer_index.segment_count(filters)
+        if count is None:
+            count = count_matching(filters)
         
         # Create Segment
         new_segment_data = {
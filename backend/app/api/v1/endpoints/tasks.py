@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from app.core.client import supabase
 from app.core.security import require_role
 from app.schemas.task import TaskCreate, TaskResponse
+from app.services.task_signal import task_signal
 
 tasks_bp = Blueprint("tasks", __name__)
 
@@ -23,6 +24,9 @@ def create_task():
         response = supabase.table("tasks").insert(task_data).execute()
         new_task = response.data[0]
         
+        # Wake up bots long-polling /bots/pending-tasks or /bots/claim
+        task_signal.notify()
+        
         return jsonify(new_task), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -1,10 +1,68 @@
+import csv
+import uuid
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from app.core.client import supabase
+from app.core.config import settings
 from app.core.security import require_role
 from app.schemas.volunteer import VolunteerCreate, VolunteerUpdate
+from app.services.catalog import catalog
+from app.services.segment_filters import build_query
+from app.services.volunteer_import import FORMATS, ImportFormatError, import_volunteers
+from app.services.volunteer_index import volunteer_index
+from app.services.volunteer_lookup import fetch_volunteers_by_ids
 
 volunteers_bp = Blueprint("volunteers", __name__)
 
+LIST_COLUMNS = "*, skills(*), campaigns(*)"
+VOLUNTEER_FIELDS = (
+    "id", "name", "email", "phone", "region", "city", "availability",
+    "volunteer_type", "status", "notes", "created_at", "updated_at",
+)
+RELATIONS = {"skills": "skills(*)", "campaigns": "campaigns(*)"}
+# "estimated" is exact on small results and uses the planner estimate on large ones
+TOTAL_COUNT_MODES = {"exact": "exact", "estimated": "estimated"}
+
+def _split_param(name):
+    return [v.strip() for raw in request.args.getlist(name) for v in raw.split(",") if v.strip()]
+
+def _select_columns(required=()):
+    """
+    PostgREST select for ``fields=`` (volunteer columns) and ``include=``
+    (skills, campaigns). Without either, the full volunteer with relations.
+    """
+    fields = _split_param("fields")
+    include = _split_param("include")
+    if not fields and not include:
+        return LIST_COLUMNS
+
+    unknown = [f for f in fields if f not in VOLUNTEER_FIELDS] + [r for r in include if r not in RELATIONS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields/include: {', '.join(unknown)}. "
+            f"fields: {', '.join(VOLUNTEER_FIELDS)}; include: {', '.join(RELATIONS)}"
+        )
+
+    columns = list(dict.fromkeys([*required, *fields])) if fields else ["*"]
+    columns += [RELATIONS[r] for r in dict.fromkeys(include)]
+    return ", ".join(columns)
+
+def _parse_cursor(value):
+    """Split and validate an ``after`` cursor (<created_at>,<id>)."""
+    created_at, _, volunteer_id = value.rpartition(",")
+    try:
+        datetime.fromisoformat(created_at)
+        uuid.UUID(volunteer_id)
+    except ValueError:
+        raise ValueError("after must be '<created_at>,<id>' as returned in X-Next-Cursor")
+    return created_at, volunteer_id
+
+def _with_version(response, volunteer):
+    """Expose updated_at as the ETag that PUT accepts in If-Match."""
+    if volunteer and volunteer.get("updated_at"):
+        response.set_etag(volunteer["updated_at"])
+    return response
+
 @volunteers_bp.route("/", methods=["POST"])
 @require_role(("coordinator", "worker"))
 def create_volunteer():
@@ -20,6 +78,7 @@ def create_volunteer():
         # Insert Volunteer
         response = supabase.table("volunteers").insert(vol_data).execute()
         new_vol = response.data[0]
+        volunteer_index.mark_dirty(new_vol["id"])
         
         # Handle Skills (Many-to-Many)
         if volunteer_in.skills:
@@ -32,55 +91,115 @@ def create_volunteer():
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+def _import_format(filename=None):
+    fmt = request.args.get("format")
+    if not fmt and filename and "." in filename:
+        fmt = filename.rsplit(".", 1)[1]
+    if not fmt:
+        fmt = "csv" if "csv" in (request.mimetype or "") else "jsonl"
+    fmt = fmt.lower()
+    return "jsonl" if fmt in ("ndjson", "json") else fmt
+
+@volunteers_bp.route("/import", methods=["POST"])
+@require_role("coordinator")
+def import_volunteers_endpoint():
+    """
+    Bulk import volunteers from CSV or JSONL, upserting on email.
+    Send a multipart ``file`` or the raw body (text/csv, application/x-ndjson);
+    ``?format=csv|jsonl`` overrides detection. Returns a per-row error report.
+    """
+    try:
+        upload = request.files.get("file")
+        if upload:
+            stream, fmt = upload.stream, _import_format(upload.filename)
+        else:
+            stream, fmt = request.stream, _import_format()
+        if fmt not in FORMATS:
+            return jsonify({"error": f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}"}), 400
+
+        report = import_volunteers(stream, fmt)
+        if report["imported"]:
+            volunteer_index.request_rebuild()
+        return jsonify(report)
+    except (ImportFormatError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @volunteers_bp.route("/", methods=["GET"])
 @require_role(("coordinator", "worker"))
 def get_volunteers():
-    """Get all volunteers with filtering and pagination."""
+    """
+    List volunteers, newest first.
+    Query: limit, skills (repeatable, any of them), search (ranked by relevance),
+    fields=name,region,... and include=skills,campaigns to trim the payload,
+    after=<created_at>,<id> (value of the previous page's X-Next-Cursor header),
+    total=exact|estimated to get X-Total-Count. ``skip`` still works but gets
+    slower on deep pages.
+    """
     try:
         skip = int(request.args.get("skip", 0))
-        limit = int(request.args.get("limit", 100))
+        limit = min(int(request.args.get("limit", 100)), settings.SUPABASE_MAX_ROWS)
         search = request.args.get("search")
         skills = request.args.getlist("skills")
-        
-        query = supabase.table("volunteers").select("*, skills(*), campaigns(*)")
-        
+        total_mode = request.args.get("total")
+        if total_mode and total_mode not in TOTAL_COUNT_MODES:
+            return jsonify({"error": f"total must be one of {', '.join(TOTAL_COUNT_MODES)}"}), 400
+
         if search:
-            resp = supabase.rpc("buscar_voluntarios", {"termino": search}).execute()
+            # Ranked, accent-insensitive and typo tolerant from the in-process index
+            ranked = volunteer_index.search(search, limit, filters={"any_skills": skills})
+            if ranked is not None:
+                data, _ = fetch_volunteers_by_ids([vol_id for vol_id, _ in ranked], _select_columns(("id",)))
+                return jsonify(data)
+            # Index still loading: buscar_voluntarios returns SETOF volunteers, so it takes the same select
+            resp = supabase.rpc("buscar_voluntarios", {"termino": search}).select(_select_columns(("id",))).execute()
             return jsonify(resp.data)
-            
-        # Note: Filtering by related table (skills) is tricky in single query with Supabase-py
-        # We might need to filter in memory or use !inner join if supported by the client helper
-        # For now, let's just fetch and filter if skills are provided, or rely on client-side filtering
-        
-        # Pagination
-        query = query.range(skip, skip + limit - 1)
-        
+
+        # The skills filter is an inner join, so every page is full regardless of selectivity
+        select_kwargs = {"count": TOTAL_COUNT_MODES[total_mode]} if total_mode else {}
+        # id and created_at are always selected: the cursor is built from them
+        columns = _select_columns(("id", "created_at"))
+        query = build_query({"any_skills": skills}, columns, **select_kwargs)\
+            .order("created_at", desc=True)\
+            .order("id", desc=True)
+
+        after = request.args.get("after")
+        if after:
+            created_at, volunteer_id = _parse_cursor(after)
+            query = query.or_(
+                f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{volunteer_id})'
+            ).limit(limit)
+        else:
+            query = query.range(skip, skip + limit - 1)
+
         response = query.execute()
         data = response.data
-        
-        # Manual filtering for skills if needed (since basic ORM-like filtering on relations is limited)
-        if skills:
-            filtered_data = []
-            for vol in data:
-                vol_skills = [s["name"] for s in vol.get("skills", [])]
-                if any(skill in vol_skills for skill in skills):
-                    filtered_data.append(vol)
-            data = filtered_data
-
-        return jsonify(data)
+
+        result = jsonify(data)
+        if len(data) == limit:
+            result.headers["X-Next-Cursor"] = f"{data[-1]['created_at']},{data[-1]['id']}"
+        if total_mode and response.count is not None:
+            result.headers["X-Total-Count"] = str(response.count)
+        return result
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @volunteers_bp.route("/<string:volunteer_id>", methods=["GET"])
 @require_role(("coordinator", "worker"))
 def get_volunteer(volunteer_id):
-    """Get a single volunteer by ID."""
+    """Get a single volunteer by ID. Accepts the same fields=/include= as the list."""
     try:
-        response = supabase.table("volunteers").select("*, skills(*), campaigns(*)").eq("id", volunteer_id).single().execute()
+        columns = _select_columns(("id", "updated_at"))
+        response = supabase.table("volunteers").select(columns).eq("id", volunteer_id).single().execute()
         volunteer = response.data
         if not volunteer:
             return jsonify({"error": "Volunteer not found"}), 404
-        return jsonify(volunteer)
+        return _with_version(jsonify(volunteer), volunteer)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         # Supabase client raises an exception if .single() finds no data
         if "No rows found" in str(e):
@@ -90,7 +209,11 @@ def get_volunteer(volunteer_id):
 @volunteers_bp.route("/<string:volunteer_id>", methods=["PUT"])
 @require_role(("coordinator", "worker"))
 def update_volunteer(volunteer_id):
-    """Update a volunteer."""
+    """
+    Update a volunteer and, if given, replace its skills/campaigns by name.
+    Send ``If-Match`` with the ETag from a previous GET/PUT to reject the
+    update (412) when someone else changed the volunteer in between.
+    """
     try:
         data = request.get_json()
         
@@ -100,78 +223,38 @@ def update_volunteer(volunteer_id):
             
         volunteer_update = VolunteerUpdate(**data)
         update_data = volunteer_update.model_dump(exclude_unset=True, exclude={"skills", "campaigns"})
-        
-        # Update main volunteer data if there are fields to update
-        if update_data:
-            response = supabase.table("volunteers").update(update_data).eq("id", volunteer_id).execute()
-            if not response.data:
-                return jsonify({"error": "Volunteer not found"}), 404
-        else:
-            # Verify existence if no main fields are being updated
-            check = supabase.table("volunteers").select("id").eq("id", volunteer_id).execute()
-            if not check.data:
-                 return jsonify({"error": "Volunteer not found"}), 404
-            
-        # Handle Skills Update
-        if volunteer_update.skills is not None:
-            # 1. Clear existing skills
-            supabase.table("volunteer_skills").delete().eq("volunteer_id", volunteer_id).execute()
-            
-            if volunteer_update.skills:
-                # 2. Find existing IDs
-                skills_resp = supabase.table("skills").select("id, name").in_("name", volunteer_update.skills).execute()
-                skill_map = {s["name"]: s["id"] for s in skills_resp.data}
-                
-                # 3. Identify missing skills and create them
-                missing_skills = [s for s in volunteer_update.skills if s not in skill_map]
-                if missing_skills:
-                    new_skills_payload = [{"name": s} for s in missing_skills]
-                    create_resp = supabase.table("skills").insert(new_skills_payload).execute()
-                    for s in create_resp.data:
-                        skill_map[s["name"]] = s["id"]
-
-                # 4. Insert new links
-                new_links = []
-                for skill_name in volunteer_update.skills:
-                    if skill_name in skill_map:
-                        new_links.append({"volunteer_id": volunteer_id, "skill_id": skill_map[skill_name]})
-                
-                if new_links:
-                    supabase.table("volunteer_skills").insert(new_links).execute()
-
-        # Handle Campaigns Update
-        if volunteer_update.campaigns is not None:
-            # 1. Clear existing campaigns
-            supabase.table("volunteer_campaigns").delete().eq("volunteer_id", volunteer_id).execute()
-            
-            if volunteer_update.campaigns:
-                # 2. Find existing IDs
-                camp_resp = supabase.table("campaigns").select("id, name").in_("name", volunteer_update.campaigns).execute()
-                camp_map = {c["name"]: c["id"] for c in camp_resp.data}
-                
-                # 3. Identify missing campaigns and create them (default year to current year if unknown)
-                missing_campaigns = [c for c in volunteer_update.campaigns if c not in camp_map]
-                if missing_campaigns:
-                    import datetime
-                    current_year = datetime.datetime.now().year
-                    new_campaigns_payload = [{"name": c, "year": current_year} for c in missing_campaigns]
-                    create_resp = supabase.table("campaigns").insert(new_campaigns_payload).execute()
-                    for c in create_resp.data:
-                        camp_map[c["name"]] = c["id"]
-
-                # 4. Insert new links
-                new_links = []
-                for camp_name in volunteer_update.campaigns:
-                    if camp_name in camp_map:
-                        new_links.append({"volunteer_id": volunteer_id, "campaign_id": camp_map[camp_name]})
-                
-                if new_links:
-                    supabase.table("volunteer_campaigns").insert(new_links).execute()
-        
-        # Fetch updated volunteer with relations
-        final_response = supabase.table("volunteers").select("*, skills(*), campaigns(*)").eq("id", volunteer_id).single().execute()
-        
-        return jsonify(final_response.data)
+
+        # Reuse the catalog spelling so "diseno grafico" doesn't add a second "Diseño Gráfico"
+        skills = catalog.canonical_skills(volunteer_update.skills) if volunteer_update.skills is not None else None
+        campaigns = catalog.canonical_campaigns(volunteer_update.campaigns) if volunteer_update.campaigns is not None else None
+
+        expected_version = None
+        if request.if_match and not request.if_match.star_tag:
+            # Weak tags too: compressed GET responses carry W/"<updated_at>"
+            expected_version = next(iter(request.if_match.as_set(include_weak=True)), None)
+
+        # One transaction: field update, link diff against the current
+        # relations and the updated volunteer (with relations) as the result
+        response = supabase.rpc("update_volunteer_with_relations", {
+            "p_id": volunteer_id,
+            "p_fields": update_data,
+            "p_skills": skills,
+            "p_campaigns": campaigns,
+            "p_expected_version": expected_version,
+        }).execute()
+        volunteer = response.data
+
+        # Re-read right away instead of waiting for the next delta sync
+        volunteer_index.mark_dirty(volunteer_id)
+        if not catalog.knows_all(skills or (), campaigns or ()):
+            catalog.invalidate()
+
+        return _with_version(jsonify(volunteer), volunteer)
     except Exception as e:
+        code = getattr(e, "code", None)
+        if code == "PT404":
+            return jsonify({"error": "Volunteer not found"}), 404
+        if code == "PT412":
+            return jsonify({"error": "Volunteer was modified by someone else; reload and retry"}), 412
         print(f"Error updating volunteer: {e}")
         return jsonify({"error": str(e)}), 400
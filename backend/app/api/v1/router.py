@@ -9,6 +9,7 @@ from app.api.v1.endpoints.bots import bots_bp
 from app.api.v1.endpoints.auth import auth_bp
 from app.api.v1.endpoints.config import config_bp
 from app.api.v1.endpoints.notifications import notifications_bp
+from app.api.v1.endpoints.catalog import catalog_bp
 
 api_bp = Blueprint('api_v1', __name__)
 
@@ -22,6 +23,7 @@ api_bp.register_blueprint(logs_bp, url_prefix='/logs')
 api_bp.register_blueprint(auth_bp, url_prefix='/auth')
 api_bp.register_blueprint(config_bp, url_prefix='/config')
 api_bp.register_blueprint(notifications_bp, url_prefix='/notifications')
+api_bp.register_blueprint(catalog_bp, url_prefix='/catalog')
 
 try:
     from app.api.v1.endpoints.assistant import assistant_bp
@@ -0,0 +1,141 @@
+"""
+Per-worker response cache for read-only endpoints.
+
+``cached_response`` stores the rendered body of successful responses keyed by
+path and query string. Within ``ttl`` the cached body is served as is; for a
+further ``stale_ttl`` seconds the stale body is still served while a single
+background refresh recomputes it. Every cached response carries an ``ETag``
+and ``Cache-Control`` header and ``If-None-Match`` is answered with 304.
+
+Place it *below* the auth decorator so permissions are still checked::
+
+    @metrics_bp.route("/overview", methods=["GET"])
+    @require_role("admin")
+    @cached_response(ttl=60)
+    def get_overview():
+        ...
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import copy_current_request_context, make_response, request
+
+MAX_ENTRIES = 256
+
+
+class _Entry:
+    __slots__ = ("body", "status", "mimetype", "etag", "created")
+
+    def __init__(self, body: bytes, status: int, mimetype: str):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = etag_for(body)
+        self.created = time.monotonic()
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def conditional_response(body: bytes, mimetype: str, max_age: int, etag: str = None, status: int = 200):
+    """Build a response with ETag/Cache-Control, or a 304 if the client already has it."""
+    etag = etag or etag_for(body)
+    # Weak comparison: the compression layer weakens ETags of encoded bodies
+    if request.if_none_match.contains_weak(etag.strip('"')):
+        response = make_response("", 304)
+    else:
+        response = make_response(body, status)
+        response.mimetype = mimetype
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = f"private, max-age={max_age}"
+    return response
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry: _Entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def claim_refresh(self, key) -> bool:
+        """Return True if the caller should run the refresh for ``key``."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def release_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self, prefix: str = None):
+        """Drop every entry, or only those whose path starts with ``prefix``."""
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0].startswith(prefix)]:
+                    del self._entries[key]
+
+
+response_cache = ResponseCache()
+
+
+def _render(f, args, kwargs):
+    response = make_response(f(*args, **kwargs))
+    if response.status_code != 200 or response.is_streamed:
+        return response, None
+    return response, _Entry(response.get_data(), response.status_code, response.mimetype)
+
+
+def cached_response(ttl: int = 60, stale_ttl: int = 300, cache: ResponseCache = response_cache):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            entry = cache.get(key)
+            age = time.monotonic() - entry.created if entry else None
+
+            if entry is None or age > ttl + stale_ttl:
+                response, entry = _render(f, args, kwargs)
+                if entry is None:
+                    return response
+                cache.put(key, entry)
+            elif age > ttl and cache.claim_refresh(key):
+                @copy_current_request_context
+                def refresh():
+                    try:
+                        _, fresh = _render(f, args, kwargs)
+                        if fresh is not None:
+                            cache.put(key, fresh)
+                    except Exception as e:
+                        print(f"Background refresh of {key[0]} failed: {e}")
+                    finally:
+                        cache.release_refresh(key)
+
+                threading.Thread(target=refresh, daemon=True).start()
+
+            return conditional_response(entry.body, entry.mimetype, ttl, entry.etag, entry.status)
+        return decorated_function
+    return decorator
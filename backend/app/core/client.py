@@ -1,4 +1,118 @@
-from supabase import create_client, Client
+"""
+Supabase client, one per worker process.
+
+``supabase`` is a thin proxy: the real client is created by ``init_client``,
+which gunicorn calls from its ``post_fork`` hook (see ``gunicorn.conf.py``), so
+no HTTP connection is ever shared across a fork. Outside gunicorn the client is
+created on first use, and a pid check recreates it in a forked child.
+
+The client talks through an explicitly sized keep-alive ``httpx`` pool
+(HTTP/2 when ``h2`` is installed) and ``connection_stats`` counts requests
+against new TCP connections and TLS handshakes, so reuse can be watched in
+``GET /api/v1/metrics/connections``.
+"""
+import os
+import threading
+
+import httpx
+from supabase import Client, ClientOptions, create_client
+
 from app.core.config import settings
 
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class ConnectionStats:
+    """Per-process counters fed by httpcore's trace extension."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            self._count("connections")
+        elif event == "connection.start_tls.complete":
+            self._count("tls_handshakes")
+
+    def on_request(self, request: httpx.Request):
+        self._count("requests")
+        request.extensions["trace"] = self.trace
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "requests": self.requests,
+                "new_connections": self.connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reused": max(self.requests - self.connections, 0),
+            }
+
+
+connection_stats = ConnectionStats()
+
+
+def http_client_kwargs() -> dict:
+    """Pool, timeout and HTTP/2 settings for the client's httpx pool."""
+    return {
+        "http2": settings.SUPABASE_HTTP2 and HTTP2_AVAILABLE,
+        "limits": httpx.Limits(
+            max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(settings.SUPABASE_HTTP_TIMEOUT, connect=settings.SUPABASE_HTTP_CONNECT_TIMEOUT),
+    }
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def init_client(warm_up: bool = False) -> Client:
+    """Create this process's client; with ``warm_up`` the first connection is opened right away."""
+    global _client, _client_pid
+    with _client_lock:
+        http = httpx.Client(event_hooks={"request": [connection_stats.on_request]}, **http_client_kwargs())
+        _client = create_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_SERVICE_ROLE_KEY,
+            options=ClientOptions(httpx_client=http),
+        )
+        _client_pid = os.getpid()
+
+    if warm_up:
+        # Pay TCP + TLS setup here rather than on the first request
+        try:
+            http.head(f"{settings.SUPABASE_URL}/rest/v1/", headers={"apikey": settings.SUPABASE_SERVICE_ROLE_KEY})
+        except httpx.HTTPError as e:
+            print(f"Supabase connection warm-up failed: {e}")
+    return _client
+
+
+def get_client() -> Client:
+    if _client is None or _client_pid != os.getpid():
+        return init_client()
+    return _client
+
+
+class _WorkerClient:
+    """Forwards attribute access to the current process's client."""
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+
+supabase: Client = _WorkerClient()
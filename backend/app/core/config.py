@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from pydantic_settings import BaseSettings
 from pydantic import PostgresDsn, computed_field
 from typing import Optional
@@ -15,6 +18,16 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_SERVICE_ROLE_KEY: str
+    # HTTP pool per worker process (app.core.client)
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = 32
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = 16
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY: float = 120
+    SUPABASE_HTTP_TIMEOUT: float = 30
+    SUPABASE_HTTP_CONNECT_TIMEOUT: float = 5
+    # PostgREST max-rows of the project (1000 by default on Supabase): page and
+    # chunk size for reads and bulk writes that walk whole tables
+    SUPABASE_MAX_ROWS: int = 1000
     
     @computed_field
     @property
@@ -32,12 +45,49 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str
 
+    # Password hashing (pbkdf2_sha256), run in a per-worker process pool
+    PASSWORD_HASH_ROUNDS: int = 29000
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 5
+
     # Google Gemini / ADK
     GOOGLE_API_KEY: Optional[str] = None
 
+    # Assistant sessions (app.services.session_store): SQLite file shared by all
+    # workers plus a per-worker hot cache
+    ASSISTANT_SESSION_DB: str = "assistant_sessions.sqlite3"
+    ASSISTANT_SESSION_CACHE_MAX_SESSIONS: int = 256
+    ASSISTANT_SESSION_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    ASSISTANT_SESSION_IDLE_SECONDS: float = 1800
+    ASSISTANT_SESSION_RETENTION_DAYS: float = 7
+
     # Blue Prism
     BLUE_PRISM_API_KEY: Optional[str] = None
 
+    # Seconds a worker may serve cached rows from the configurations table
+    CONFIG_CACHE_TTL_SECONDS: float = 30
+
+    # Seconds between full reloads of the per-worker volunteer index, which only
+    # catch deleted volunteers (0: never; updates arrive as deltas)
+    VOLUNTEER_INDEX_FULL_REBUILD_SECONDS: float = 6 * 3600
+
+    # Seconds a worker may serve the skills/campaigns catalog before reloading it
+    CATALOG_CACHE_TTL_SECONDS: float = 300
+
+    # Response compression (app.core.compression)
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Bulk email dispatch (Gmail: messages.send costs 100 of 250 quota units/s)
+    EMAIL_SEND_RATE_PER_SECOND: float = 2.5
+    EMAIL_SEND_BURST: int = 5
+    EMAIL_SEND_WORKERS: int = 8
+    EMAIL_SEND_MAX_RETRIES: int = 4
+    # State file of the send budget shared by every worker on the host (empty: per worker)
+    EMAIL_SEND_BUCKET_FILE: str = os.path.join(tempfile.gettempdir(), "botathon_email_bucket")
+
     class Config:
         env_file = ".env"
         case_sensitive = True
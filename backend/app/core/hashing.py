@@ -0,0 +1,128 @@
+"""
+Password hashing off the request path.
+
+pbkdf2 is deliberately CPU-bound, so hashing and verification run in a small
+dedicated process pool instead of the gunicorn worker. At most
+``PASSWORD_HASH_MAX_PENDING`` jobs may be queued per worker; beyond that
+callers wait up to ``PASSWORD_HASH_QUEUE_TIMEOUT`` seconds and then get
+``HashingBusy`` (the endpoints answer 503 + Retry-After).
+
+The cost is ``PASSWORD_HASH_ROUNDS``. Stored hashes made with a different
+round count are transparently re-hashed on the next successful login.
+
+Run ``python -m app.core.hashing`` for a throughput test across pool sizes.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue stays full for longer than the timeout."""
+
+
+@lru_cache(maxsize=4)
+def build_context(rounds: int) -> CryptContext:
+    # min == max == default, so any change of PASSWORD_HASH_ROUNDS marks old
+    # hashes as needing an update
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds,
+    )
+
+
+# These run inside the pool processes and must stay module-level (picklable).
+
+def _hash(password: str, rounds: int) -> str:
+    return build_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return build_context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_pending: int = settings.PASSWORD_HASH_MAX_PENDING,
+        queue_timeout: float = settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+        rounds: int = settings.PASSWORD_HASH_ROUNDS,
+    ):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self.rounds = rounds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Created lazily so each gunicorn worker gets its own pool after the fork.
+        # forkserver avoids forking a multi-threaded (gthread) worker.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            return self._executor
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        # A pool whose process died (e.g. OOM-killed) stays broken; replace it
+        with self._lock:
+            if self._executor is pool:
+                self._executor = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingBusy("Password hashing queue is full")
+        try:
+            for attempt in (1, 2):
+                pool = self._pool()
+                try:
+                    return pool.submit(fn, *args).result()
+                except BrokenProcessPool:
+                    self._discard(pool)
+                    if attempt == 2:
+                        raise
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.rounds)
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Return (valid, new_hash); new_hash is set when the stored cost is outdated."""
+        return self._run(_verify_and_update, password, hashed, self.rounds)
+
+
+password_hasher = PasswordHasher()
+
+
+if __name__ == "__main__":
+    import time
+
+    jobs = 64
+    for workers in (1, 2, 4, 8):
+        hasher = PasswordHasher(workers=workers, max_pending=jobs)
+        hasher.hash("warm-up")
+        threads = [threading.Thread(target=hasher.hash, args=(f"password-{i}",)) for i in range(jobs)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        print(f"{workers} hashing processes: {jobs / elapsed:6.1f} hashes/s ({settings.PASSWORD_HASH_ROUNDS} rounds)")
+        hasher._executor.shutdown()
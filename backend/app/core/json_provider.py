@@ -0,0 +1,45 @@
+"""
+Flask JSON provider backed by orjson.
+
+orjson serializes dicts/lists several times faster than the stdlib encoder and
+handles ``datetime``/``date`` (ISO 8601) and ``UUID`` natively; anything else
+falls back to Flask's ``DefaultJSONProvider.default`` (Decimal, dataclasses...).
+Keys stay sorted like Flask's default so response bodies (and their ETags) are
+stable. If orjson is not installed the app keeps Flask's provider.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            # Formatting options (indent, separators...) only the stdlib supports
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Install the orjson provider when available."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
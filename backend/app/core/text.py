@@ -0,0 +1,9 @@
+"""Text normalization shared by the catalog lookups and the volunteer search."""
+import unicodedata
+
+
+def normalize_name(name: str) -> str:
+    """Lookup key: accents stripped, case-folded, whitespace collapsed."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
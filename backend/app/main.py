@@ -2,14 +2,23 @@ import os
 from flask import Flask
 from flask_cors import CORS
 from app.core.config import settings
+from app.core.compression import init_compression
+from app.core.json_provider import init_json
 from app.api.v1.router import api_bp
 
 def create_app():
     app = Flask(settings.PROJECT_NAME)
+    init_json(app)
+    init_compression(app)
 
     # Enable CORS
     ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
-    CORS(app, resources={r"/api/*": {"origins": ALLOWED_ORIGINS}}, supports_credentials=True)
+    CORS(
+        app,
+        resources={r"/api/*": {"origins": ALLOWED_ORIGINS}},
+        supports_credentials=True,
+        expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"],
+    )
     
     # Register Blueprints
     app.register_blueprint(api_bp, url_prefix=settings.API_V1_STR)
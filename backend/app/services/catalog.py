@@ -0,0 +1,116 @@
+"""
+In-process snapshot of the ``skills`` and ``campaigns`` catalogs.
+
+Both tables are tiny and almost never change, so each worker keeps id <-> name
+maps in memory, reloads them once the TTL expires and drops them after any
+write that may add entries. Lookups by name are case-, accent- and
+whitespace-insensitive, so "diseno  grafico" resolves to "Diseño Gráfico"
+instead of creating a near-duplicate.
+
+The serialized snapshot and its ETag are kept alongside the maps so
+``GET /catalog`` costs nothing but a conditional response.
+"""
+import json
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from app.core.cache import etag_for
+from app.core.client import supabase
+from app.core.config import settings
+from app.core.text import normalize_name
+
+
+class CatalogSnapshot:
+    def __init__(self, skills: list, campaigns: list, version: int):
+        self.version = version
+        self.skills = sorted(skills, key=lambda s: normalize_name(s["name"]))
+        self.campaigns = sorted(campaigns, key=lambda c: (-(c.get("year") or 0), normalize_name(c["name"])))
+
+        self.skill_by_id = {s["id"]: s for s in self.skills}
+        self.skill_by_key = {}
+        for s in self.skills:
+            self.skill_by_key.setdefault(normalize_name(s["name"]), s)
+
+        self.campaign_by_id = {c["id"]: c for c in self.campaigns}
+        self.campaigns_by_key = {}  # newest year first
+        for c in self.campaigns:
+            self.campaigns_by_key.setdefault(normalize_name(c["name"]), []).append(c)
+
+        self.body = json.dumps(
+            {"skills": self.skills, "campaigns": self.campaigns}, ensure_ascii=False
+        ).encode("utf-8")
+        self.etag = etag_for(self.body)
+
+
+class Catalog:
+    def __init__(self, ttl: float = settings.CATALOG_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at = 0.0
+        self.version = 0
+
+    def reload(self) -> CatalogSnapshot:
+        """Fetch both tables and replace the snapshot."""
+        skills = supabase.table("skills").select("id, name").execute().data
+        campaigns = supabase.table("campaigns").select("*").execute().data
+        with self._lock:
+            self.version += 1
+            self._snapshot = CatalogSnapshot(skills, campaigns, self.version)
+            self._loaded_at = time.monotonic()
+            return self._snapshot
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Current catalog, reloaded if older than the TTL."""
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - self._loaded_at > self.ttl:
+            snapshot = self.reload()
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def skill(self, name: str) -> Optional[dict]:
+        return self.snapshot().skill_by_key.get(normalize_name(name))
+
+    def campaign(self, name: str, year: Optional[int] = None) -> Optional[dict]:
+        """Campaign by name; the most recent one unless ``year`` is given."""
+        for c in self.snapshot().campaigns_by_key.get(normalize_name(name), []):
+            if year is None or c.get("year") == year:
+                return c
+        return None
+
+    def canonical_skills(self, names: Iterable[str]) -> List[str]:
+        """Spell each name as the catalog does; unknown names are kept (trimmed), duplicates dropped."""
+        result = {}
+        for name in names:
+            known = self.skill(name)
+            canonical = known["name"] if known else " ".join(name.split())
+            result.setdefault(normalize_name(canonical), canonical)
+        return list(result.values())
+
+    def canonical_campaigns(self, names: Iterable[str]) -> List[str]:
+        result = {}
+        for name in names:
+            known = self.campaign(name)
+            canonical = known["name"] if known else " ".join(name.split())
+            result.setdefault(normalize_name(canonical), canonical)
+        return list(result.values())
+
+    def latest_campaign(self) -> Optional[dict]:
+        """Most recent campaign (highest year), or None if there are none."""
+        campaigns = self.snapshot().campaigns
+        return campaigns[0] if campaigns else None
+
+    def knows_all(self, skills: Iterable[str] = (), campaigns: Iterable[str] = ()) -> bool:
+        """False if a write with these names may have added catalog entries."""
+        return all(self.skill(n) for n in skills) and all(self.campaign(n) for n in campaigns)
+
+
+catalog = Catalog()
@@ -0,0 +1,69 @@
+"""
+In-process snapshot of the ``configurations`` table.
+
+Reads are served from a versioned snapshot that is reloaded once the TTL
+expires; writes through ``upsert_many`` go out as a single bulk upsert and
+invalidate the snapshot immediately. Other workers pick the change up when
+their own TTL expires.
+"""
+import threading
+import time
+from typing import Iterable, Optional
+
+from app.core.client import supabase
+from app.core.config import settings
+
+
+class ConfigStore:
+    def __init__(self, ttl: float = settings.CONFIG_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._values: Optional[dict] = None
+        self._loaded_at = 0.0
+        self.version = 0
+
+    def reload(self) -> dict:
+        """Fetch the whole table and replace the snapshot."""
+        rows = supabase.table("configurations").select("key, value").execute().data
+        values = {row["key"]: row["value"] for row in rows}
+        with self._lock:
+            self._values = values
+            self._loaded_at = time.monotonic()
+            self.version += 1
+        return values
+
+    def snapshot(self) -> dict:
+        """Current key/value mapping, reloaded if older than the TTL."""
+        values = self._values
+        if values is None or time.monotonic() - self._loaded_at > self.ttl:
+            values = self.reload()
+        return values
+
+    def get(self, key: str, default=None):
+        return self.snapshot().get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> dict:
+        values = self.snapshot()
+        return {key: values[key] for key in keys if key in values}
+
+    def invalidate(self):
+        with self._lock:
+            self._values = None
+            self.version += 1
+
+    def upsert_many(self, items: dict) -> list:
+        """Write several keys in one request and invalidate the snapshot."""
+        if not items:
+            return []
+        payload = [
+            {"key": key, "value": str(value), "updated_at": "now()"}
+            for key, value in items.items()
+        ]
+        try:
+            response = supabase.table("configurations").upsert(payload).execute()
+        finally:
+            self.invalidate()
+        return response.data
+
+
+config_store = ConfigStore()
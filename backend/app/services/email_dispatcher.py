@@ -0,0 +1,191 @@
+"""
+Concurrent, rate-limited Gmail sender for bulk communications.
+
+All sends share one pooled ``requests.Session`` and a bounded thread pool. A
+token bucket keeps the sender under the Gmail per-user quota, and 429/5xx
+responses are retried with exponential backoff (honouring ``Retry-After``).
+The bucket's state lives in a small file locked with ``flock``, so every
+gunicorn worker on the host draws from the same budget; without ``fcntl``
+(Windows) it falls back to a per-process bucket.
+Every recipient gets a result dict::
+
+    {"email": str, "status": "sent" | "failed", "attempts": int, "error": str | None}
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.core.config import settings
+from app.services.email_service import GMAIL_SEND_URL, build_gmail_payload, get_gmail_credentials
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 32.0
+REQUEST_TIMEOUT = (5, 30)  # connect, read
+
+
+BUCKET_STATE_SIZE = 64  # bytes: "<tokens> <updated>" padded
+
+
+class TokenBucket:
+    """
+    Thread- and process-safe token bucket; ``acquire`` blocks until a token is
+    available. With a ``path``, the state is shared through that file.
+    """
+
+    def __init__(self, rate: float, capacity: int, path: Optional[str] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.path = path if fcntl else None
+        self._tokens = float(capacity)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+        self._fd = None
+        self._fd_pid = None
+
+    def _file(self) -> int:
+        # flock belongs to the open file, so each forked worker opens its own
+        if self._fd is None or self._fd_pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+    def _refill_and_take(self) -> float:
+        """Take a token if there is one; return 0, or the seconds until the next one."""
+        now = time.time()
+        tokens = min(self.capacity, self._tokens + max(now - self._updated, 0) * self.rate)
+        self._updated = now
+        if tokens >= 1:
+            self._tokens = tokens - 1
+            return 0
+        self._tokens = tokens
+        return (1 - tokens) / self.rate
+
+    def _take_shared(self) -> float:
+        fd = self._file()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            try:
+                self._tokens, self._updated = map(float, os.pread(fd, BUCKET_STATE_SIZE, 0).split())
+            except ValueError:
+                # New (or unreadable) state file: start full
+                self._tokens, self._updated = float(self.capacity), time.time()
+            wait = self._refill_and_take()
+            os.pwrite(fd, f"{self._tokens:.6f} {self._updated:.6f}".encode().ljust(BUCKET_STATE_SIZE), 0)
+            return wait
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                wait = self._take_shared() if self.path else self._refill_and_take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class EmailDispatcher:
+    def __init__(
+        self,
+        rate: float = settings.EMAIL_SEND_RATE_PER_SECOND,
+        burst: int = settings.EMAIL_SEND_BURST,
+        workers: int = settings.EMAIL_SEND_WORKERS,
+        max_retries: int = settings.EMAIL_SEND_MAX_RETRIES,
+        bucket_path: Optional[str] = settings.EMAIL_SEND_BUCKET_FILE,
+    ):
+        self.workers = workers
+        self.max_retries = max_retries
+        self._bucket = TokenBucket(rate, burst, bucket_path)
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="email")
+
+    @staticmethod
+    def _backoff(attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), BACKOFF_MAX_SECONDS)
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempt - 1), BACKOFF_MAX_SECONDS)
+        return delay + random.uniform(0, delay / 2)
+
+    def _send_one(self, sender_email: str, access_token: str, to_email: str, subject: str, body: str) -> dict:
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        }
+        payload = build_gmail_payload(sender_email, to_email, subject, body)
+
+        error = None
+        for attempt in range(1, self.max_retries + 2):
+            self._bucket.acquire()
+            response = None
+            try:
+                response = self._session.post(GMAIL_SEND_URL, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+                if response.status_code == 200:
+                    return {"email": to_email, "status": "sent", "attempts": attempt, "error": None}
+                error = f"Gmail API Error {response.status_code}: {response.text}"
+                retryable = response.status_code in RETRY_STATUSES
+            except requests.RequestException as e:
+                error = str(e)
+                retryable = True
+
+            if not retryable or attempt > self.max_retries:
+                break
+            time.sleep(self._backoff(attempt, response))
+
+        return {"email": to_email, "status": "failed", "attempts": attempt, "error": error}
+
+    def send_batch(self, messages: Iterable[tuple], config: Optional[dict] = None) -> list:
+        """
+        Send ``(to_email, subject, body)`` tuples concurrently and return one
+        result per message, in input order. Gmail credentials are read once.
+        """
+        sender_email, access_token = get_gmail_credentials(config)
+        futures = [
+            self._executor.submit(self._send_one, sender_email, access_token, to_email, subject, body)
+            for to_email, subject, body in messages
+        ]
+        return [f.result() for f in futures]
+
+    def send_batch_in_background(
+        self,
+        build_messages: Callable[[], Iterable[tuple]],
+        on_complete: Callable[[list], None],
+        on_error: Callable[[Exception], None],
+        config: Optional[dict] = None,
+    ):
+        """
+        Run ``send_batch`` outside the request so large campaigns don't hit
+        the gunicorn worker timeout. ``build_messages`` runs in the background
+        thread too, so fetching recipients doesn't block the response either.
+        """
+        def run():
+            try:
+                results = self.send_batch(build_messages(), config)
+            except Exception as e:
+                on_error(e)
+                return
+            try:
+                on_complete(results)
+            except Exception as e:
+                # Last chance to record the outcome of a batch that was already sent
+                sent = sum(1 for r in results if r["status"] == "sent")
+                print(f"Email batch finished ({sent}/{len(results)} sent) but on_complete failed: {e}")
+
+        threading.Thread(target=run, daemon=True, name="email-batch").start()
+
+
+email_dispatcher = EmailDispatcher()
@@ -1,23 +1,26 @@
 import base64
 import requests
 from email.mime.text import MIMEText
-from app.core.client import supabase
+from app.services.config_store import config_store
+
+GMAIL_SEND_URL = "https://gmail.googleapis.com/gmail/v1/users/me/messages/send"
 
 def get_email_config():
-    """Fetch email config from Supabase."""
-    response = supabase.table("configurations").select("*").in_("key", ["gmail_email", "gmail_token"]).execute()
-    config = {item["key"]: item["value"] for item in response.data}
-    return config
+    """Fetch email config from the cached configuration snapshot."""
+    return config_store.get_many(["gmail_email", "gmail_token"])
 
-def send_email(to_email, subject, body):
-    """Send email using Gmail API."""
-    config = get_email_config()
+def get_gmail_credentials(config=None):
+    """Return (sender_email, access_token), raising if either is missing."""
+    config = config if config is not None else get_email_config()
     sender_email = config.get("gmail_email")
     access_token = config.get("gmail_token")
     
     if not sender_email or not access_token:
         raise ValueError("Gmail configuration missing (email or token).")
+    return sender_email, access_token
 
+def build_gmail_payload(sender_email, to_email, subject, body):
+    """Build the Gmail API JSON payload for a plain-text message."""
     # Create MIME Message
     message = MIMEText(body)
     message["to"] = to_email
@@ -26,16 +29,20 @@ def send_email(to_email, subject, body):
     
     # Encode as base64url
     raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+    return {"raw": raw_message}
+
+def send_email(to_email, subject, body):
+    """Send email using Gmail API."""
+    sender_email, access_token = get_gmail_credentials()
     
     # Send via Gmail API
-    url = "https://gmail.googleapis.com/gmail/v1/users/me/messages/send"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json"
     }
-    payload = {"raw": raw_message}
+    payload = build_gmail_payload(sender_email, to_email, subject, body)
     
-    response = requests.post(url, headers=headers, json=payload)
+    response = requests.post(GMAIL_SEND_URL, headers=headers, json=payload)
     
     if response.status_code != 200:
         raise Exception(f"Gmail API Error: {response.text}")
@@ -0,0 +1,134 @@
+"""
+Single interpretation of segment ``filters`` dicts.
+
+Segments, communications and the assistant all describe a set of volunteers
+with the same keys::
+
+    {"search": str, "region": str, "availability": str, "volunteer_type": str,
+     "status": str, "skills": [str, ...], "any_skills": [str, ...], "campaign": str}
+
+``skills`` requires every listed skill, ``any_skills`` at least one of them
+(always an exact name match).
+
+``normalize_filters`` turns whatever the client sent into a canonical dict and
+``build_query`` compiles it into one PostgREST request. Skill and campaign
+filters become aliased ``!inner`` embeds (one per required skill, since every
+skill must match), so only matching volunteers ever cross the wire.
+
+With ``contains=True`` the free-text columns (region, availability, skills,
+campaign) match case-insensitive substrings instead of exact values; status
+and volunteer_type are always exact. The in-process volunteer index follows
+the same rules.
+"""
+from typing import Optional
+
+from app.core.client import supabase
+
+TEXT_FIELDS = ("region", "availability")
+EXACT_FIELDS = ("volunteer_type", "status")
+SCALAR_FIELDS = TEXT_FIELDS + EXACT_FIELDS
+
+
+def normalize_filters(filters: Optional[dict]) -> dict:
+    """Drop empty values and "all" sentinels; always return skills as a list."""
+    filters = filters or {}
+    spec = {}
+
+    if filters.get("search"):
+        spec["search"] = str(filters["search"]).strip()
+
+    for field in SCALAR_FIELDS:
+        value = filters.get(field)
+        if value and value != "all":
+            spec[field] = value
+
+    skills = filters.get("skills") or []
+    if isinstance(skills, str):
+        skills = [skills]
+    skills = [s for s in dict.fromkeys(skills) if s]
+    if skills:
+        spec["skills"] = skills
+
+    any_skills = filters.get("any_skills") or []
+    if isinstance(any_skills, str):
+        any_skills = [any_skills]
+    any_skills = [s for s in dict.fromkeys(any_skills) if s]
+    if any_skills:
+        spec["any_skills"] = any_skills
+
+    campaign = filters.get("campaign")
+    if campaign and campaign != "all":
+        spec["campaign"] = campaign
+
+    return spec
+
+
+def _skill_alias(i: int) -> str:
+    return f"skill_{i}"
+
+
+CAMPAIGN_ALIAS = "campaign_0"
+ANY_SKILL_ALIAS = "any_skill"
+
+
+def select_columns(columns: str, spec: dict) -> str:
+    """
+    Append the inner-join embeds needed to filter on skills and campaign. They
+    are empty (``alias:table!inner()``): they filter without adding anything
+    to the returned rows.
+    """
+    parts = [columns]
+    for i, _ in enumerate(spec.get("skills", [])):
+        parts.append(f"{_skill_alias(i)}:skills!inner()")
+    if "any_skills" in spec:
+        parts.append(f"{ANY_SKILL_ALIAS}:skills!inner()")
+    if "campaign" in spec:
+        parts.append(f"{CAMPAIGN_ALIAS}:campaigns!inner()")
+    return ", ".join(parts)
+
+
+def _match(query, column: str, value: str, contains: bool):
+    if contains:
+        return query.ilike(column, f"%{value}%")
+    return query.eq(column, value)
+
+
+def apply_filters(query, spec: dict, contains: bool = False):
+    """
+    Apply a normalized filter spec to a volunteers query whose select was
+    built with ``select_columns``.
+    """
+    if "search" in spec:
+        term = spec["search"]
+        query = query.or_(f"name.ilike.%{term}%,email.ilike.%{term}%")
+
+    for field in TEXT_FIELDS:
+        if field in spec:
+            query = _match(query, field, spec[field], contains)
+
+    for field in EXACT_FIELDS:
+        if field in spec:
+            query = query.eq(field, spec[field])
+
+    for i, skill in enumerate(spec.get("skills", [])):
+        query = _match(query, f"{_skill_alias(i)}.name", skill, contains)
+
+    if "any_skills" in spec:
+        query = query.in_(f"{ANY_SKILL_ALIAS}.name", spec["any_skills"])
+
+    if "campaign" in spec:
+        query = _match(query, f"{CAMPAIGN_ALIAS}.name", spec["campaign"], contains)
+
+    return query
+
+
+def build_query(filters: Optional[dict], columns: str = "*", contains: bool = False, **select_kwargs):
+    """Compile a filters dict into a single volunteers query."""
+    spec = normalize_filters(filters)
+    query = supabase.table("volunteers").select(select_columns(columns, spec), **select_kwargs)
+    return apply_filters(query, spec, contains)
+
+
+def count_matching(filters: Optional[dict], contains: bool = False) -> int:
+    """Exact number of volunteers matching the filters, computed by the database."""
+    return build_query(filters, "id", contains, count="exact", head=True).execute().count
@@ -0,0 +1,354 @@
+"""
+Assistant sessions persisted in SQLite with a bounded in-memory hot cache.
+
+Every gunicorn worker opens the same SQLite file (WAL mode), so a follow-up
+turn that lands on another worker still sees the whole conversation, and
+sessions survive restarts. Each worker keeps recently used sessions in an LRU
+cache; a cached copy is used only while its ``update_time`` still matches the
+database (one indexed lookup), so a turn served elsewhere is never missed.
+
+The cache is bounded three ways: entries idle for ``idle_seconds`` are
+dropped, and the least recently used entries are evicted once the cache holds
+more than ``max_sessions`` sessions or ``max_bytes`` of serialized events.
+Sessions untouched for ``retention_days`` are deleted from disk.
+
+Sessions are keyed by (app_name, user_id, session_id), so a user can only
+reach their own conversations. ``app:``/``user:`` prefixed state is stored with
+the session that wrote it; ``temp:`` state lives for one invocation and is never
+persisted.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+from app.core.config import settings
+
+PURGE_INTERVAL = 3600  # seconds between retention sweeps
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name    TEXT NOT NULL,
+    user_id     TEXT NOT NULL,
+    id          TEXT NOT NULL,
+    state       TEXT NOT NULL DEFAULT '{}',
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_update_time ON sessions(update_time);
+CREATE TABLE IF NOT EXISTS events (
+    app_name   TEXT NOT NULL,
+    user_id    TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp  REAL NOT NULL,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_session ON events(app_name, user_id, session_id, seq);
+"""
+
+
+def _persistent(state: dict) -> dict:
+    return {k: v for k, v in (state or {}).items() if not k.startswith(State.TEMP_PREFIX)}
+
+
+def _persistent_event(event: Event) -> Event:
+    delta = event.actions.state_delta if event.actions else None
+    if not delta or len(_persistent(delta)) == len(delta):
+        return event
+    actions = event.actions.model_copy(update={"state_delta": _persistent(delta)})
+    return event.model_copy(update={"actions": actions})
+
+
+class _CacheEntry:
+    __slots__ = ("session", "size", "last_used")
+
+    def __init__(self, session: Session, size: int):
+        self.session = session
+        self.size = size
+        self.last_used = time.monotonic()
+
+
+class SqliteSessionService(BaseSessionService):
+    def __init__(
+        self,
+        path: str = settings.ASSISTANT_SESSION_DB,
+        max_sessions: int = settings.ASSISTANT_SESSION_CACHE_MAX_SESSIONS,
+        max_bytes: int = settings.ASSISTANT_SESSION_CACHE_MAX_BYTES,
+        idle_seconds: float = settings.ASSISTANT_SESSION_IDLE_SECONDS,
+        retention_days: float = settings.ASSISTANT_SESSION_RETENTION_DAYS,
+    ):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.retention_seconds = retention_days * 86400
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # (app, user, id) -> _CacheEntry
+        self._cache_bytes = 0
+        self._last_purge = 0.0
+        self.hits = 0
+        self.misses = 0
+        with self._db() as db:
+            db.executescript(SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets workers read while another writes
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _stored_update_time(self, key: tuple) -> Optional[float]:
+        row = self._db().execute(
+            "SELECT update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+        ).fetchone()
+        return row[0] if row else None
+
+    def _load(self, key: tuple) -> Optional[tuple]:
+        db = self._db()
+        row = db.execute(
+            "SELECT state, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        rows = db.execute(
+            "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY seq", key
+        ).fetchall()
+        session = Session(
+            app_name=key[0],
+            user_id=key[1],
+            id=key[2],
+            state=json.loads(row[0]),
+            events=[Event.model_validate_json(data) for (data,) in rows],
+            last_update_time=row[1],
+        )
+        return session, sum(len(data) for (data,) in rows)
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        cutoff = time.time() - self.retention_seconds
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "DELETE FROM events WHERE (app_name, user_id, session_id) IN "
+                "(SELECT app_name, user_id, id FROM sessions WHERE update_time < ?)", (cutoff,)
+            )
+            db.execute("DELETE FROM sessions WHERE update_time < ?", (cutoff,))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    # ------------------------------------------------------------------
+    # Hot cache
+    # ------------------------------------------------------------------
+
+    def _cache_get(self, key: tuple) -> Optional[_CacheEntry]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._cache.move_to_end(key)
+            return entry
+
+    def _cache_put(self, key: tuple, session: Session, size: int):
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cache_bytes -= old.size
+            self._cache[key] = _CacheEntry(session, size)
+            self._cache_bytes += size
+            self._evict()
+
+    def _cache_drop(self, key: tuple):
+        with self._lock:
+            entry = self._cache.pop(key, None)
+            if entry is not None:
+                self._cache_bytes -= entry.size
+
+    def _evict(self):
+        idle_cutoff = time.monotonic() - self.idle_seconds
+        while self._cache:
+            key, entry = next(iter(self._cache.items()))
+            if (
+                len(self._cache) > self.max_sessions
+                or self._cache_bytes > self.max_bytes
+                or entry.last_used < idle_cutoff
+            ):
+                del self._cache[key]
+                self._cache_bytes -= entry.size
+            else:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._evict()
+            return {
+                "cached_sessions": len(self._cache),
+                "cached_bytes": self._cache_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    # ------------------------------------------------------------------
+    # BaseSessionService
+    # ------------------------------------------------------------------
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        self._purge_expired()
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        now = time.time()
+        stored = _persistent(state)
+        inserted = self._db().execute(
+            "INSERT INTO sessions (app_name, user_id, id, state, update_time) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT DO NOTHING",
+            (app_name, user_id, session_id, json.dumps(stored), now),
+        ).rowcount
+        if not inserted:
+            # A concurrent request (e.g. auto_create_session) created it first
+            existing = await self.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+            if existing is not None:
+                return existing
+        session = Session(app_name=app_name, user_id=user_id, id=session_id, state=state or {}, last_update_time=now)
+        self._cache_put(
+            (app_name, user_id, session_id),
+            Session(app_name=app_name, user_id=user_id, id=session_id, state=stored, last_update_time=now),
+            0,
+        )
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        entry = self._cache_get(key)
+        stored = self._stored_update_time(key)
+        if stored is None:
+            self._cache_drop(key)
+            return None
+
+        if entry is not None and entry.session.last_update_time == stored:
+            self.hits += 1
+            session = entry.session.model_copy(deep=True)
+        else:
+            # Not cached here, or another worker added a turn since
+            self.misses += 1
+            loaded = self._load(key)
+            if loaded is None:
+                return None
+            session, size = loaded
+            self._cache_put(key, session.model_copy(deep=True), size)
+
+        if config:
+            if config.after_timestamp:
+                session.events = [e for e in session.events if e.timestamp >= config.after_timestamp]
+            if config.num_recent_events:
+                session.events = session.events[-config.num_recent_events:]
+        return session
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        query = "SELECT user_id, id, state, update_time FROM sessions WHERE app_name = ?"
+        params = [app_name]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        rows = self._db().execute(query + " ORDER BY update_time DESC", params).fetchall()
+        return ListSessionsResponse(sessions=[
+            Session(app_name=app_name, user_id=uid, id=sid, state=json.loads(state), last_update_time=updated)
+            for uid, sid, state, updated in rows
+        ])
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+            db.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        self._cache_drop(key)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        key = (session.app_name, session.user_id, session.id)
+        stored = _persistent_event(event)
+        state = json.dumps(_persistent(session.state), default=str)
+        data = stored.model_dump_json(exclude_none=True)
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # What the session looked like just before this event; the write lock keeps it exact
+            previous = self._stored_update_time(key)
+            db.execute(
+                "INSERT INTO events (app_name, user_id, session_id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                (*key, event.timestamp, data),
+            )
+            db.execute(
+                "UPDATE sessions SET state = ?, update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                (state, session.last_update_time, *key),
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+        # Extend the cached copy in place only if it held every earlier event;
+        # if another worker appended in between (or it was evicted), the next get reloads it
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry.session.last_update_time != previous:
+                del self._cache[key]
+                self._cache_bytes -= entry.size
+            elif entry is not None:
+                entry.session.events.append(stored.model_copy(deep=True))
+                entry.session.state = json.loads(state)
+                entry.session.last_update_time = session.last_update_time
+                entry.size += len(data)
+                self._cache_bytes += len(data)
+                entry.last_used = time.monotonic()
+                self._cache.move_to_end(key)
+                self._evict()
+        return event
+
+
+session_service = SqliteSessionService()
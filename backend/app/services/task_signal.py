@@ -0,0 +1,60 @@
+"""
+Wake-up signal for long-polling bots.
+
+``notify`` is called whenever a task is created. Waiters in the same process
+are woken through a ``threading.Condition``; waiters in the other gunicorn
+workers notice because ``notify`` also touches a small signal file whose
+mtime they check every ``POLL_INTERVAL`` seconds (a local ``stat``, no
+database traffic).
+"""
+import os
+import tempfile
+import threading
+import time
+
+POLL_INTERVAL = 0.25
+SIGNAL_PATH = os.path.join(tempfile.gettempdir(), "botathon-task-signal")
+
+
+class TaskSignal:
+    def __init__(self, path: str = SIGNAL_PATH):
+        self.path = path
+        self._cond = threading.Condition()
+        self._generation = 0
+
+    def _file_stamp(self) -> int:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def token(self):
+        """Opaque marker of the current state; take it *before* checking for work."""
+        with self._cond:
+            return self._generation, self._file_stamp()
+
+    def notify(self):
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+        try:
+            with open(self.path, "a"):
+                os.utime(self.path, None)
+        except OSError as e:
+            print(f"Could not touch task signal file: {e}")
+
+    def wait(self, token, timeout: float) -> bool:
+        """Block until something was notified after ``token`` or ``timeout`` expires."""
+        generation, stamp = token
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._generation != generation or self._file_stamp() != stamp:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, POLL_INTERVAL))
+
+
+task_signal = TaskSignal()
@@ -0,0 +1,279 @@
+"""
+Bulk volunteer import.
+
+Rows are read from a CSV or JSONL stream one at a time, validated with
+``VolunteerCreate`` and written in chunks: one upsert on ``email`` per chunk
+of volunteers, one lookup/insert per chunk for unknown skills and campaigns,
+and one insert per chunk for each kind of link, after which the linked
+volunteers get a fresh ``updated_at`` so change tracking sees the new links. A chunk the database rejects
+is split in halves until the offending rows are isolated, so the report
+names exactly the rows that failed.
+
+CSV columns match the volunteer fields; ``skills`` and ``campaigns`` hold
+``;``-separated names, a campaign optionally written as ``name:year``. JSONL
+rows may give campaigns as ``{"name", "year"}`` objects or plain names.
+Columns a row leaves out are not touched on existing volunteers (new ones get
+the table defaults), and links are added, never removed: re-importing a
+roster only fills gaps.
+"""
+import csv
+import datetime
+import io
+import json
+from typing import IO, Iterator, List, Tuple
+
+from pydantic import ValidationError
+
+from app.core.client import supabase
+from app.core.config import settings
+from app.schemas.volunteer import VolunteerCreate
+from app.services.catalog import catalog
+from app.services.volunteer_lookup import ID_CHUNK
+
+MAX_REPORTED_ERRORS = 1000   # the failed count is always exact, the list is capped
+LIST_SEPARATOR = ";"
+VOLUNTEER_STATUSES = ("Activo", "Inactivo", "Pendiente")  # CHECK constraint on volunteers.status
+FORMATS = ("csv", "jsonl")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def _split(value) -> list:
+    if isinstance(value, list):
+        return value
+    return [v.strip() for v in (value or "").split(LIST_SEPARATOR) if v.strip()]
+
+
+def _campaign(value) -> dict:
+    if isinstance(value, dict):
+        return value
+    name, _, year = str(value).rpartition(":")
+    if name and year.strip().isdigit():
+        return {"name": name.strip(), "year": int(year)}
+    return {"name": str(value).strip()}
+
+
+def _iter_csv(stream: IO[bytes]) -> Iterator[Tuple[int, dict]]:
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    for row_number, row in enumerate(reader, start=1):
+        # Empty cells mean "not provided" so schema defaults apply
+        yield row_number, {k.strip(): v.strip() for k, v in row.items() if k and v and v.strip()}
+
+
+def _iter_jsonl(stream: IO[bytes]) -> Iterator[Tuple[int, dict]]:
+    for row_number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            row = e
+        yield row_number, row
+
+
+def iter_rows(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, object]]:
+    """Yield ``(row_number, raw_row)``; row numbers are 1-based data rows (CSV) or lines (JSONL)."""
+    if fmt == "csv":
+        return _iter_csv(stream)
+    if fmt == "jsonl":
+        return _iter_jsonl(stream)
+    raise ImportFormatError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+
+
+def _validate(raw) -> VolunteerCreate:
+    if isinstance(raw, Exception):
+        raise ValueError(f"Invalid JSON: {raw}")
+    if not isinstance(raw, dict):
+        raise ValueError("Each row must be an object")
+    raw = dict(raw)
+    if "volunteerType" in raw:
+        raw["volunteer_type"] = raw.pop("volunteerType")
+    raw["skills"] = _split(raw.get("skills"))
+    raw["campaigns"] = [_campaign(c) for c in _split(raw.get("campaigns"))]
+
+    volunteer = VolunteerCreate(**raw)
+    if volunteer.status not in VOLUNTEER_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(VOLUNTEER_STATUSES)}")
+    for campaign in volunteer.campaigns:
+        if not campaign.get("name"):
+            raise ValueError("every campaign needs a name")
+        if campaign.get("year") is not None and not str(campaign["year"]).strip().isdigit():
+            raise ValueError(f"campaign '{campaign['name']}' has an invalid year")
+    return volunteer
+
+
+def _error_messages(e: Exception) -> List[str]:
+    if isinstance(e, ValidationError):
+        return [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+    return [str(e)]
+
+
+class VolunteerImporter:
+    def __init__(self, chunk_size: int = settings.SUPABASE_MAX_ROWS):
+        self.chunk_size = chunk_size
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._skill_ids = {}       # name -> id, shared by every chunk of this import
+        self._campaign_ids = {}    # (name, year) -> id
+        self._current_year = datetime.datetime.now().year
+
+    def _fail(self, row_number: int, messages: List[str]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": messages})
+
+    def run(self, rows: Iterator[Tuple[int, object]]) -> dict:
+        chunk = {}  # email -> (row_number, VolunteerCreate); a repeated email keeps the last row
+        for row_number, raw in rows:
+            self.total += 1
+            try:
+                volunteer = _validate(raw)
+            except (ValidationError, ValueError, TypeError) as e:
+                self._fail(row_number, _error_messages(e))
+                continue
+
+            email = volunteer.email.lower()
+            if email in chunk:
+                self._fail(chunk[email][0], [f"email repeated in row {row_number}, which was imported instead"])
+            chunk[email] = (row_number, volunteer)
+            if len(chunk) >= self.chunk_size:
+                self._flush(list(chunk.values()))
+                chunk = {}
+        if chunk:
+            self._flush(list(chunk.values()))
+
+        return {
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _flush(self, chunk: List[Tuple[int, VolunteerCreate]]):
+        # One upsert per set of provided columns: the conflict update then only
+        # touches what the file gave, and new rows get the table defaults
+        groups = {}
+        for row_number, volunteer in chunk:
+            columns = frozenset(self._columns(volunteer))
+            groups.setdefault(columns, []).append((row_number, volunteer))
+        saved = []
+        for group in groups.values():
+            saved.extend(self._upsert_volunteers(group))
+        if not saved:
+            return
+
+        try:
+            self._resolve_catalogs([v for _, v, _ in saved])
+            skill_links, campaign_links = [], []
+            for _, volunteer, volunteer_id in saved:
+                skill_links.extend(
+                    {"volunteer_id": volunteer_id, "skill_id": self._skill_ids[name]}
+                    for name in dict.fromkeys(volunteer.skills)
+                )
+                campaign_links.extend(
+                    {"volunteer_id": volunteer_id, "campaign_id": self._campaign_ids[key]}
+                    for key in dict.fromkeys(self._campaign_key(c) for c in volunteer.campaigns)
+                )
+            if skill_links:
+                supabase.table("volunteer_skills")\
+                    .upsert(skill_links, on_conflict="volunteer_id,skill_id", ignore_duplicates=True)\
+                    .execute()
+            if campaign_links:
+                supabase.table("volunteer_campaigns")\
+                    .upsert(campaign_links, on_conflict="volunteer_id,campaign_id", ignore_duplicates=True)\
+                    .execute()
+        except Exception as e:
+            # Volunteer rows are in; only their skills/campaigns are missing
+            for row_number, _, _ in saved:
+                self._fail(row_number, [f"saved without skills/campaigns: {e}"])
+            self.imported -= len(saved)
+            return
+
+        try:
+            self._touch(dict.fromkeys(link["volunteer_id"] for link in skill_links + campaign_links))
+        except Exception as e:
+            # The links are in; only change tracking lags until the next full index rebuild
+            print(f"Could not bump updated_at after import links: {e}")
+
+    @staticmethod
+    def _touch(volunteer_ids):
+        # Link writes leave volunteers.updated_at alone; bump it so delta
+        # readers (the volunteer index, ETags) see the new skills/campaigns
+        ids = list(volunteer_ids)
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        for i in range(0, len(ids), ID_CHUNK):
+            supabase.table("volunteers").update({"updated_at": now}).in_("id", ids[i:i + ID_CHUNK]).execute()
+
+    @staticmethod
+    def _columns(volunteer: VolunteerCreate) -> dict:
+        return volunteer.model_dump(exclude_unset=True, exclude={"skills", "campaigns"})
+
+    def _upsert_volunteers(self, chunk: List[Tuple[int, VolunteerCreate]]) -> List[Tuple[int, VolunteerCreate, str]]:
+        """Upsert rows sharing one column set on email; bisect on failure to isolate the bad rows."""
+        payload = [self._columns(v) for _, v in chunk]
+        try:
+            rows = supabase.table("volunteers").upsert(payload, on_conflict="email").execute().data
+        except Exception as e:
+            if len(chunk) == 1:
+                self._fail(chunk[0][0], [str(e)])
+                return []
+            middle = len(chunk) // 2
+            return self._upsert_volunteers(chunk[:middle]) + self._upsert_volunteers(chunk[middle:])
+
+        ids = {row["email"].lower(): row["id"] for row in rows}
+        saved = [(n, v, ids[v.email.lower()]) for n, v in chunk if v.email.lower() in ids]
+        self.imported += len(saved)
+        return saved
+
+    def _campaign_key(self, campaign: dict) -> tuple:
+        return campaign["name"], int(campaign.get("year") or self._current_year)
+
+    def _resolve_catalogs(self, volunteers: List[VolunteerCreate]):
+        skills = {name for v in volunteers for name in v.skills} - self._skill_ids.keys()
+        for name in list(skills):
+            # Known under any spelling/casing/accents: link to the existing entry
+            known = catalog.skill(name)
+            if known:
+                self._skill_ids[name] = known["id"]
+                skills.discard(name)
+        if skills:
+            # skills.name is UNIQUE: one upsert both creates and returns every id
+            rows = supabase.table("skills")\
+                .upsert([{"name": name} for name in skills], on_conflict="name")\
+                .execute().data
+            self._skill_ids.update((row["name"], row["id"]) for row in rows)
+            catalog.invalidate()
+
+        campaigns = {self._campaign_key(c) for v in volunteers for c in v.campaigns} - self._campaign_ids.keys()
+        for key in list(campaigns):
+            known = catalog.campaign(*key)
+            if known:
+                self._campaign_ids[key] = known["id"]
+                campaigns.discard(key)
+        if campaigns:
+            names = sorted({name for name, _ in campaigns})
+            rows = supabase.table("campaigns").select("id, name, year").in_("name", names).execute().data
+            for row in rows:
+                self._campaign_ids.setdefault((row["name"], row["year"]), row["id"])
+
+            missing = campaigns - self._campaign_ids.keys()
+            if missing:
+                rows = supabase.table("campaigns")\
+                    .insert([{"name": name, "year": year} for name, year in missing])\
+                    .execute().data
+                self._campaign_ids.update(((row["name"], row["year"]), row["id"]) for row in rows)
+                catalog.invalidate()
+
+
+def import_volunteers(stream: IO[bytes], fmt: str, chunk_size: int = settings.SUPABASE_MAX_ROWS) -> dict:
+    """Import a CSV/JSONL stream and return the summary with per-row errors."""
+    return VolunteerImporter(chunk_size).run(iter_rows(stream, fmt))
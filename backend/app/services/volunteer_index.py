@@ -0,0 +1,364 @@
+"""
+Per-worker inverted index over volunteers.
+
+Each distinct region / availability / volunteer_type / status value and each
+skill and campaign name maps to a bitset (a Python int) of volunteer slots, so
+segment filters are answered by AND-ing a handful of integers instead of
+pulling every volunteer row over PostgREST. Name, email, region and city also
+feed a ``TrigramIndex`` for accent-insensitive, ranked free-text search
+(``search()``); that ranking is deliberately looser than the filters.
+
+The index is loaded lazily in a background thread the first time it is used
+and kept fresh from ``updated_at`` deltas. Deltas cannot see deleted rows, so
+a full reload also runs every ``VOLUNTEER_INDEX_FULL_REBUILD_SECONDS``; it
+rebuilds the trigram index too (seconds of CPU at 100k volunteers), so it is
+kept rare. ``request_rebuild`` (called after a bulk import) touches a signal
+file, and every worker compares its mtime on each use, so all of them reload,
+not only the one that served the import.
+
+Segment filters select the same volunteers as ``segment_filters.build_query``
+(``contains`` and "search" are case-insensitive substrings per field, like
+``ilike``; accents count); until the index is ready, callers get ``None`` back
+and should fall back to ``build_query``.
+"""
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from app.core.client import supabase
+from app.core.config import settings
+from app.services.segment_filters import EXACT_FIELDS, SCALAR_FIELDS, TEXT_FIELDS, normalize_filters
+from app.services.task_signal import TaskSignal
+from app.services.volunteer_lookup import fetch_volunteers_by_ids
+from app.services.volunteer_search import TrigramIndex, bits_from_slots, iter_slots
+
+INDEX_COLUMNS = (
+    "id, name, email, city, region, availability, volunteer_type, status, updated_at, "
+    "skills(name), campaigns(name)"
+)
+
+DELTA_INTERVAL = 5          # seconds between updated_at delta syncs
+REBUILD_RETRY = 30          # seconds to wait after a failed rebuild before trying again
+REBUILD_SIGNAL_PATH = os.path.join(tempfile.gettempdir(), "botathon-volunteer-index-signal")
+
+
+def _names(rows) -> tuple:
+    return tuple(r["name"] for r in (rows or []) if r and r.get("name"))
+
+
+class VolunteerIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loading = False
+        self._syncing = False
+        self._failed_at = None
+        self._rebuild_signal = TaskSignal(REBUILD_SIGNAL_PATH)
+        self._rebuild_token = None   # signal state seen by the last rebuild
+        self._reset()
+
+    def _reset(self):
+        self._slots = {}        # volunteer id -> slot
+        self._ids = []          # slot -> volunteer id
+        self._docs = {}         # slot -> indexed values (needed to unindex on update)
+        self._postings = {f: defaultdict(int) for f in SCALAR_FIELDS}
+        self._skills = defaultdict(int)
+        self._campaigns = defaultdict(int)
+        self._search = TrigramIndex()
+        self._all = 0
+        self._watermark = None
+        self._dirty = set()
+        self._ready = False
+        self._last_delta = 0.0
+        self._last_full = 0.0
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _fetch_all(self) -> list:
+        rows, last_id = [], None
+        while True:
+            q = supabase.table("volunteers").select(INDEX_COLUMNS).order("id").limit(settings.SUPABASE_MAX_ROWS)
+            if last_id is not None:
+                q = q.gt("id", last_id)
+            page = q.execute().data
+            rows.extend(page)
+            if len(page) < settings.SUPABASE_MAX_ROWS:
+                return rows
+            last_id = page[-1]["id"]
+
+    def _fetch_delta(self, since: str) -> list:
+        # Keyset on (updated_at, id): a bulk write stamps many rows with the
+        # same updated_at, and offsets over ties can skip or repeat rows
+        rows, after = [], None
+        while True:
+            q = supabase.table("volunteers").select(INDEX_COLUMNS)\
+                .order("updated_at").order("id").limit(settings.SUPABASE_MAX_ROWS)
+            if after is None:
+                q = q.gte("updated_at", since)
+            else:
+                updated_at, last_id = after
+                q = q.or_(f'updated_at.gt."{updated_at}",and(updated_at.eq."{updated_at}",id.gt.{last_id})')
+            page = q.execute().data
+            rows.extend(page)
+            if len(page) < settings.SUPABASE_MAX_ROWS:
+                return rows
+            after = page[-1]["updated_at"], page[-1]["id"]
+
+    def _fetch_ids(self, ids: list) -> list:
+        rows, _ = fetch_volunteers_by_ids(ids, INDEX_COLUMNS)
+        return rows
+
+    def rebuild(self):
+        """Load every volunteer and swap in a freshly built index."""
+        rows = self._fetch_all()
+
+        slots, ids, docs = {}, [], {}
+        scalar = {f: defaultdict(list) for f in SCALAR_FIELDS}
+        skills, campaigns = defaultdict(list), defaultdict(list)
+        watermark = None
+
+        for slot, row in enumerate(rows):
+            doc = self._doc(row)
+            slots[row["id"]] = slot
+            ids.append(row["id"])
+            docs[slot] = doc
+            for f, value in zip(SCALAR_FIELDS, doc):
+                scalar[f][value].append(slot)
+            for name in doc[4]:
+                skills[name].append(slot)
+            for name in doc[5]:
+                campaigns[name].append(slot)
+            if row.get("updated_at") and (watermark is None or row["updated_at"] > watermark):
+                watermark = row["updated_at"]
+        search = TrigramIndex.build(enumerate(rows))
+
+        with self._lock:
+            self._slots, self._ids, self._docs = slots, ids, docs
+            self._postings = {
+                f: defaultdict(int, {v: bits_from_slots(s) for v, s in scalar[f].items()})
+                for f in SCALAR_FIELDS
+            }
+            self._skills = defaultdict(int, {n: bits_from_slots(s) for n, s in skills.items()})
+            self._campaigns = defaultdict(int, {n: bits_from_slots(s) for n, s in campaigns.items()})
+            self._search = search
+            self._all = (1 << len(ids)) - 1
+            self._watermark = watermark
+            self._ready = True
+            self._last_delta = self._last_full = time.monotonic()
+
+    def _background_rebuild(self):
+        try:
+            self.rebuild()
+            self._failed_at = None
+        except Exception as e:
+            print(f"Volunteer index rebuild failed: {e}")
+            self._failed_at = time.monotonic()
+        finally:
+            self._loading = False
+
+    def _start_rebuild(self):
+        with self._lock:
+            if self._loading:
+                return
+            # Back off after a failure; requests keep using build_query meanwhile
+            if self._failed_at is not None and time.monotonic() - self._failed_at < REBUILD_RETRY:
+                return
+            self._loading = True
+            self._rebuild_token = self._rebuild_signal.token()
+        threading.Thread(target=self._background_rebuild, daemon=True).start()
+
+    def sync(self):
+        """Apply rows changed since the last sync plus locally dirtied ids."""
+        with self._lock:
+            since = self._watermark
+            dirty, self._dirty = self._dirty, set()
+
+        rows = self._fetch_delta(since) if since else []
+        if dirty:
+            rows.extend(self._fetch_ids(list(dirty)))
+
+        with self._lock:
+            for row in rows:
+                self._upsert(row)
+                if row.get("updated_at") and (self._watermark is None or row["updated_at"] > self._watermark):
+                    self._watermark = row["updated_at"]
+            self._last_delta = time.monotonic()
+
+    def ensure_fresh(self) -> bool:
+        """
+        Make sure the index is usable. Returns False while the initial load is
+        still running so the caller can fall back to the database.
+        """
+        if not self._ready:
+            self._start_rebuild()
+            return False
+
+        now = time.monotonic()
+        full_interval = settings.VOLUNTEER_INDEX_FULL_REBUILD_SECONDS
+        if full_interval and now - self._last_full > full_interval:
+            self._start_rebuild()
+        elif self._rebuild_signal.token() != self._rebuild_token:
+            # Some worker asked for a reload (e.g. after a bulk import)
+            self._start_rebuild()
+        if self._dirty or now - self._last_delta > DELTA_INTERVAL:
+            # One request runs the delta query; the others use the index as it is
+            with self._lock:
+                if self._syncing:
+                    return True
+                self._syncing = True
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Volunteer index delta sync failed: {e}")
+                return False
+            finally:
+                self._syncing = False
+        return True
+
+    def mark_dirty(self, volunteer_id: str):
+        """Re-read a volunteer on the next sync (e.g. after a relation-only edit)."""
+        with self._lock:
+            self._dirty.add(volunteer_id)
+
+    def request_rebuild(self):
+        """Reload everything in the background, in every worker (e.g. after a bulk import)."""
+        self._rebuild_signal.notify()
+        if self._ready:
+            self._start_rebuild()
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _doc(row) -> tuple:
+        return tuple(row.get(f) for f in SCALAR_FIELDS) + (
+            _names(row.get("skills")),
+            _names(row.get("campaigns")),
+        )
+
+    def _upsert(self, row):
+        slot = self._slots.get(row["id"])
+        if slot is None:
+            slot = len(self._ids)
+            self._slots[row["id"]] = slot
+            self._ids.append(row["id"])
+            self._all |= 1 << slot
+        else:
+            self._unindex(slot)
+
+        doc = self._doc(row)
+        self._docs[slot] = doc
+        bit = 1 << slot
+        for f, value in zip(SCALAR_FIELDS, doc):
+            self._postings[f][value] |= bit
+        for name in doc[4]:
+            self._skills[name] |= bit
+        for name in doc[5]:
+            self._campaigns[name] |= bit
+        self._search.add(slot, row)
+
+    def _unindex(self, slot: int):
+        doc = self._docs.pop(slot, None)
+        if doc is None:
+            return
+        mask = ~(1 << slot)
+        for f, value in zip(SCALAR_FIELDS, doc):
+            self._postings[f][value] &= mask
+        for name in doc[4]:
+            self._skills[name] &= mask
+        for name in doc[5]:
+            self._campaigns[name] &= mask
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _contains(postings: dict, text: str) -> int:
+        # Same as ilike '%text%' in build_query: case-insensitive only
+        needle = text.lower()
+        bits = 0
+        for value, b in postings.items():
+            if value and needle in value.lower():
+                bits |= b
+        return bits
+
+    def _lookup(self, postings: dict, value: str, contains: bool) -> int:
+        return self._contains(postings, value) if contains else postings.get(value, 0)
+
+    def _match_bits(self, filters: Optional[dict], contains: bool) -> Optional[int]:
+        spec = normalize_filters(filters)
+
+        with self._lock:
+            bits = self._all
+            if "search" in spec:
+                bits &= self._search.containing(spec["search"])
+            for f in TEXT_FIELDS:
+                if f in spec:
+                    bits &= self._lookup(self._postings[f], spec[f], contains)
+            for f in EXACT_FIELDS:
+                if f in spec:
+                    bits &= self._postings[f].get(spec[f], 0)
+            for skill in spec.get("skills", []):
+                bits &= self._lookup(self._skills, skill, contains)
+            if "any_skills" in spec:
+                any_bits = 0
+                for skill in spec["any_skills"]:
+                    any_bits |= self._skills.get(skill, 0)
+                bits &= any_bits
+            if "campaign" in spec:
+                bits &= self._lookup(self._campaigns, spec["campaign"], contains)
+        return bits
+
+    def _ids_for(self, bits: int, limit: Optional[int] = None) -> list:
+        ids = []
+        with self._lock:
+            for slot in iter_slots(bits):
+                ids.append(self._ids[slot])
+                if limit is not None and len(ids) >= limit:
+                    break
+        return ids
+
+    def segment_count(self, filters: Optional[dict], contains: bool = False) -> Optional[int]:
+        """
+        Number of volunteers matching a filters dict (see segment_filters), or
+        None if the index cannot answer it right now.
+        """
+        if not self.ensure_fresh():
+            return None
+        bits = self._match_bits(filters, contains)
+        return None if bits is None else bits.bit_count()
+
+    def segment_ids(self, filters: Optional[dict], limit: Optional[int] = None, contains: bool = False) -> Optional[list]:
+        """Volunteer ids matching a filters dict, or None if unanswerable."""
+        if not self.ensure_fresh():
+            return None
+        bits = self._match_bits(filters, contains)
+        return None if bits is None else self._ids_for(bits, limit)
+
+    def search(
+        self,
+        text: str,
+        limit: int = 20,
+        filters: Optional[dict] = None,
+        contains: bool = False,
+    ) -> Optional[List[Tuple[str, float]]]:
+        """
+        Volunteers best matching ``text`` as ``(id, score)``, highest first,
+        optionally restricted by a filters dict (its own "search" is ignored).
+        None until the index is ready.
+        """
+        if not self.ensure_fresh():
+            return None
+        filters = {k: v for k, v in (filters or {}).items() if k != "search"}
+        allowed = self._match_bits(filters, contains) if filters else None
+        with self._lock:
+            return [(self._ids[slot], score) for slot, score in self._search.search(text, limit, allowed)]
+
+
+volunteer_index = VolunteerIndex()
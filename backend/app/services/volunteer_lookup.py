@@ -0,0 +1,28 @@
+from typing import Iterable
+
+from app.core.client import supabase
+
+ID_CHUNK = 200  # keeps in_() filters well under URL length limits
+
+def fetch_volunteers_by_ids(ids: Iterable[str], columns: str = "*", chunk_size: int = ID_CHUNK):
+    """
+    Load volunteers with one in_() request per chunk of ids.
+
+    Returns ``(volunteers, missing_ids)``: volunteers follow the order of the
+    first occurrence of each id in ``ids``; ids that matched no row are
+    reported in ``missing_ids``.
+    """
+    ordered = [str(i) for i in dict.fromkeys(ids) if i]
+    if "id" not in [c.strip() for c in columns.split(",")] and columns.strip() != "*":
+        columns = f"id, {columns}"
+
+    found = {}
+    for i in range(0, len(ordered), chunk_size):
+        chunk = ordered[i:i + chunk_size]
+        rows = supabase.table("volunteers").select(columns).in_("id", chunk).execute().data
+        for row in rows:
+            found[str(row["id"])] = row
+
+    volunteers = [found[i] for i in ordered if i in found]
+    missing = [i for i in ordered if i not in found]
+    return volunteers, missing
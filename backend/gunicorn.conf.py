@@ -0,0 +1,8 @@
+# Gunicorn settings shared by run.sh and the Docker image (flags on the command line still win)
+
+
+def post_fork(server, worker):
+    # Each worker opens its own Supabase connection pool after the fork
+    from app.core.client import init_client
+
+    init_client(warm_up=True)
@@ -1,4 +1,6 @@
 #!/bin/bash
 # Run the backend with Gunicorn for stability
 # This avoids the "CurrentThreadExecutor already quit" error seen with Uvicorn+Flask
-python3 -m gunicorn -w 4 -b 0.0.0.0:8000 app.main:flask_app --access-logfile -
+# gthread workers let long-polling bots (/bots/pending-tasks?wait=) park on a thread
+# instead of holding one of the 4 worker processes
+python3 -m gunicorn -c gunicorn.conf.py -w 4 -k gthread --threads 16 -b 0.0.0.0:8000 app.main:flask_app --access-logfile -
@@ -0,0 +1,177 @@
+"""
+Shared fixtures.
+
+``app.core.config`` needs the Supabase settings at import time; the values set
+here are placeholders, nothing connects to them. Tests that touch the database
+get ``FakeSupabase``, an in-memory stand-in for the few PostgREST query builder
+calls the services make.
+"""
+import os
+import re
+
+import pytest
+
+for _name in (
+    "SUPABASE_USER", "SUPABASE_PASSWORD", "SUPABASE_HOST", "SUPABASE_URL",
+    "SUPABASE_KEY", "SUPABASE_SERVICE_ROLE_KEY", "SECRET_KEY",
+):
+    os.environ.setdefault(_name, "http://localhost" if _name == "SUPABASE_URL" else "test")
+
+# alias:table!inner(columns) or table(columns)
+_EMBED = re.compile(r"^(?:(\w+):)?(\w+)(!inner)?\((.*)\)$")
+
+
+def _split_top_level(columns: str) -> list:
+    parts, depth, current = [], 0, ""
+    for c in columns:
+        if c == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += {"(": 1, ")": -1}.get(c, 0)
+        current += c
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _ilike(value, pattern: str) -> bool:
+    regex = "^" + ".*".join(re.escape(p) for p in pattern.split("%")) + "$"
+    return value is not None and re.match(regex, str(value), re.IGNORECASE | re.DOTALL) is not None
+
+
+_OPERATORS = {
+    "eq": lambda v, x: v is not None and str(v) == x,
+    "gt": lambda v, x: v is not None and str(v) > x,
+    "ilike": lambda v, x: _ilike(v, x),
+}
+
+
+def _logic_tree(expression: str, combine):
+    predicates = []
+    for part in _split_top_level(expression):
+        if part.startswith("and(") and part.endswith(")"):
+            predicates.append(_logic_tree(part[4:-1], all))
+            continue
+        column, op, value = part.split(".", 2)
+        predicates.append(
+            lambda r, c=column, o=op, x=value.strip('"'): _OPERATORS[o](r.get(c), x)
+        )
+    return lambda r: combine(p(r) for p in predicates)
+
+
+class _Result:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, rows: list):
+        self._rows = rows
+        self._columns = None     # plain columns; None means "*"
+        self._embeds = {}        # alias -> (relation, inner, selected)
+        self._row_filters = []   # predicates on the volunteer row
+        self._embed_filters = {}  # alias -> predicates on the related rows
+        self._order = []
+        self._limit = None
+        self._offset = 0
+        self._count = None
+        self._head = False
+
+    def select(self, columns: str = "*", count=None, head=False):
+        plain = []
+        for part in _split_top_level(columns):
+            m = _EMBED.match(part)
+            if m:
+                alias, relation, inner, embedded_columns = m.groups()
+                self._embeds[alias or relation] = (relation, bool(inner), bool(embedded_columns.strip()))
+            elif part != "*":
+                plain.append(part)
+        if "*" not in _split_top_level(columns):
+            self._columns = plain
+        self._count = count
+        self._head = head
+        return self
+
+    def _filter(self, column: str, predicate):
+        alias, _, field = column.rpartition(".")
+        if alias:
+            self._embed_filters.setdefault(alias, []).append(lambda r: predicate(r.get(field)))
+        else:
+            self._row_filters.append(lambda r: predicate(r.get(field)))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: v == value)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v > value)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, lambda v: _ilike(v, pattern))
+
+    def in_(self, column, values):
+        return self._filter(column, lambda v: v in values)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v >= value)
+
+    def or_(self, expression: str):
+        # "col.op.value" alternatives, optionally grouped in and(...)
+        self._row_filters.append(_logic_tree(expression, any))
+        return self
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def range(self, start, end):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def execute(self):
+        rows = []
+        for row in self._rows:
+            if not all(p(row) for p in self._row_filters):
+                continue
+            # Related rows only come back when embedded
+            out = {k: v for k, v in row.items() if not isinstance(v, list)}
+            if self._columns is not None:
+                out = {k: out.get(k) for k in self._columns}
+            keep = True
+            for alias, (relation, inner, selected) in self._embeds.items():
+                related = [
+                    r for r in row.get(relation, [])
+                    if all(p(r) for p in self._embed_filters.get(alias, []))
+                ]
+                if inner and not related:
+                    keep = False
+                if selected:
+                    out[alias] = related
+            if keep:
+                rows.append(out)
+
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda r: r.get(column), reverse=desc)
+        count = len(rows) if self._count else None
+        end = None if self._limit is None else self._offset + self._limit
+        rows = rows[self._offset:end]
+        return _Result([] if self._head else rows, count)
+
+
+class FakeSupabase:
+    def __init__(self, tables: dict):
+        self.tables = tables
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.tables.get(name, []))
+
+
+@pytest.fixture
+def fake_supabase():
+    return FakeSupabase
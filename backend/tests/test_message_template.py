@@ -0,0 +1,45 @@
+from app.services.message_template import compile_template
+
+# "Convocatoria Campaña" stock template from frontend/app/comunicaciones/page.tsx
+CAMPAIGN_SUBJECT = "Teletón {{campaña}} - ¡Te necesitamos!"
+CAMPAIGN_CONTENT = """Estimado/a {{nombre}},
+
+Se acerca la campaña {{campaña}} y queremos invitarte a participar activamente.
+
+Tu región: {{region}}
+Disponibilidad registrada: {{disponibilidad}}
+
+Confirma tu participación respondiendo este correo o ingresando al portal de voluntarios.
+
+¡Juntos hacemos la diferencia!
+
+Equipo Teletón"""
+
+VOLUNTEER = {"name": "Ana Rojas", "email": "ana@example.org", "region": "Biobío", "availability": "Tardes"}
+
+
+def test_frontend_campaign_template_renders():
+    context = {"campaign": "Teletón 2024"}
+    body = compile_template(CAMPAIGN_CONTENT).render(VOLUNTEER, context)
+    assert body.startswith("Estimado/a Ana Rojas,")
+    assert "Se acerca la campaña Teletón 2024 y" in body
+    assert "Tu región: Biobío\nDisponibilidad registrada: Tardes" in body
+    assert "{{" not in body
+    assert compile_template(CAMPAIGN_SUBJECT).render(VOLUNTEER, context) == "Teletón Teletón 2024 - ¡Te necesitamos!"
+
+
+def test_missing_values_use_defaults():
+    template = compile_template("Hola {{ nombre }} de {{region}} ({{campaña}})")
+    assert template.render({}) == "Hola Voluntario de  ()"
+    assert compile_template("{{nombre}}", "Volunteer").render({"name": None}) == "Volunteer"
+
+
+def test_unknown_placeholders_are_kept_as_text():
+    template = compile_template("Hola {{nombre}}, tu turno es {{turno}} {{turno}}")
+    assert template.unknown == ("{{turno}}",)
+    assert template.render(VOLUNTEER) == "Hola Ana Rojas, tu turno es {{turno}} {{turno}}"
+    assert template.fields == ("nombre",)
+
+
+def test_template_without_placeholders_is_returned_as_is():
+    assert compile_template("Gracias por todo").render(VOLUNTEER) == "Gracias por todo"
@@ -0,0 +1,187 @@
+"""
+The database path (``build_query``) and the in-process ``VolunteerIndex``
+must select exactly the same volunteers for every segment filter.
+"""
+import pytest
+
+from app.services import segment_filters, volunteer_index
+from app.services.segment_filters import build_query, count_matching, normalize_filters
+
+VOLUNTEERS = [
+    {"id": "v1", "name": "Ana Rojas", "email": "ana@example.org", "city": "Concepcion",
+     "region": "Biobio", "availability": "Fines de semana", "volunteer_type": "Permanente",
+     "status": "Activo", "created_at": "2025-01-01", "updated_at": "2025-01-01",
+     "skills": [{"name": "Cocina"}, {"name": "Primeros Auxilios"}],
+     "campaigns": [{"name": "Teleton 2024"}]},
+    {"id": "v2", "name": "Jose Soto", "email": "jose@example.org", "city": "Santiago",
+     "region": "Metropolitana", "availability": "Lunes a Viernes", "volunteer_type": "Eventual",
+     "status": "Activo", "created_at": "2025-01-02", "updated_at": "2025-01-02",
+     "skills": [{"name": "Cocina"}], "campaigns": []},
+    {"id": "v3", "name": "Camila Diaz", "email": "camila@example.org", "city": "Talca",
+     "region": "Maule", "availability": "Fines de semana", "volunteer_type": "Permanente",
+     "status": "Inactivo", "created_at": "2025-01-03", "updated_at": "2025-01-03",
+     "skills": [{"name": "Primeros Auxilios"}, {"name": "Logistica"}],
+     "campaigns": [{"name": "Teleton 2024"}, {"name": "Invierno 2025"}]},
+    {"id": "v4", "name": "Tomas Perez", "email": "tomas@example.org", "city": "Los Angeles",
+     "region": "Biobio", "availability": "Mananas", "volunteer_type": "Eventual",
+     "status": "Activo", "created_at": "2025-01-04", "updated_at": "2025-01-04",
+     "skills": [], "campaigns": [{"name": "Invierno 2025"}]},
+    {"id": "v5", "name": "Valentina Munoz", "email": "vale@example.org", "city": None,
+     "region": "Metropolitana", "availability": None, "volunteer_type": None,
+     "status": "Pendiente", "created_at": "2025-01-05", "updated_at": "2025-01-05",
+     "skills": [{"name": "Logistica"}, {"name": "Cocina"}], "campaigns": []},
+    # Accents and punctuation: matched as ilike does, never folded
+    {"id": "v6", "name": "Ana Rojás", "email": "ana.x@example.cl", "city": "Chillán",
+     "region": "Biobío", "availability": "Tardes", "volunteer_type": "Eventual",
+     "status": "Activo", "created_at": "2025-01-06", "updated_at": "2025-01-06",
+     "skills": [{"name": "Diseño Gráfico"}], "campaigns": [{"name": "Teletón 2024"}]},
+]
+
+CASES = [
+    ({}, False),
+    ({"region": "all", "status": "all", "campaign": "all", "skills": []}, False),
+    ({"region": "Biobio"}, False),
+    ({"status": "Activo", "availability": "Fines de semana"}, False),
+    ({"volunteer_type": "Permanente"}, False),
+    ({"skills": ["Cocina"]}, False),
+    ({"skills": ["Cocina", "Primeros Auxilios"]}, False),
+    ({"skills": ["Cocina", "Logistica"], "status": "Pendiente"}, False),
+    ({"skills": "Logistica"}, False),
+    ({"any_skills": ["Logistica", "Primeros Auxilios"]}, False),
+    ({"any_skills": ["Cocina"], "skills": ["Logistica"]}, False),
+    ({"campaign": "Teleton 2024"}, False),
+    ({"campaign": "Invierno 2025", "region": "Biobio"}, False),
+    ({"search": "camila"}, False),
+    ({"region": "bio"}, True),
+    ({"region": "METRO", "status": "Activo"}, True),
+    ({"availability": "semana", "skills": ["auxilio"]}, True),
+    ({"skills": ["coc", "log"]}, True),
+    ({"campaign": "teleton"}, True),
+    ({"campaign": "2025", "status": "all", "region": "all"}, True),
+    ({"status": "activo"}, True),  # status stays exact even with contains
+    ({"region": "Atacama"}, False),
+    ({"search": "rojas ana"}, False),
+    ({"search": "ana rojás"}, False),
+    ({"search": "Rojás"}, False),
+    ({"search": "ROJÁS"}, False),
+    ({"search": "rojas"}, False),
+    ({"search": "ana.x"}, False),
+    ({"search": "ana x"}, False),
+    ({"search": "ás"}, False),
+    ({"search": "@example.cl"}, False),
+    ({"region": "Biobio"}, True),
+    ({"region": "Biobío"}, True),
+    ({"region": "bío"}, True),
+    ({"region": "Biobío"}, False),
+    ({"region": "Biobio"}, False),
+    ({"skills": ["diseño"]}, True),
+    ({"skills": ["diseno"]}, True),
+    ({"skills": ["Diseño Gráfico"]}, False),
+    ({"any_skills": ["Diseño Gráfico", "Cocina"]}, False),
+    ({"campaign": "teletón"}, True),
+    ({"campaign": "teleton"}, True),
+    ({"campaign": "Teletón 2024", "search": "ana"}, False),
+]
+
+
+class InlineThread:
+    """Runs background rebuilds synchronously."""
+
+    def __init__(self, target, daemon):
+        self.start = target
+
+
+@pytest.fixture
+def index(monkeypatch, fake_supabase):
+    client = fake_supabase({"volunteers": VOLUNTEERS})
+    monkeypatch.setattr(segment_filters, "supabase", client)
+    monkeypatch.setattr(volunteer_index, "supabase", client)
+    idx = volunteer_index.VolunteerIndex()
+    idx.rebuild()
+    return idx
+
+
+@pytest.mark.parametrize("filters, contains", CASES)
+def test_index_matches_database(index, filters, contains):
+    db_ids = {row["id"] for row in build_query(filters, "id", contains).execute().data}
+    assert set(index.segment_ids(filters, contains=contains)) == db_ids
+    assert index.segment_count(filters, contains=contains) == len(db_ids)
+    assert count_matching(filters, contains) == len(db_ids)
+
+
+def test_required_skills_need_every_skill(index):
+    assert set(index.segment_ids({"skills": ["Cocina", "Primeros Auxilios"]})) == {"v1"}
+    assert set(index.segment_ids({"any_skills": ["Cocina", "Primeros Auxilios"]})) == {"v1", "v2", "v3", "v5"}
+
+
+def test_all_sentinels_and_empty_values_are_dropped():
+    assert normalize_filters({"region": "all", "campaign": "all", "skills": [""], "search": ""}) == {}
+    assert normalize_filters({"skills": "Cocina", "any_skills": ["A", "A"]}) == {
+        "skills": ["Cocina"], "any_skills": ["A"],
+    }
+
+
+def test_filter_embeds_do_not_change_the_row_shape(index):
+    filters = {"skills": ["Cocina"], "any_skills": ["Cocina"], "campaign": "Teleton 2024"}
+    rows = build_query(filters, "id, name").execute().data
+    assert [set(row) for row in rows] == [{"id", "name"}]
+
+
+def test_accents_and_punctuation_are_not_folded(index):
+    assert index.segment_ids({"search": "Rojás"}) == ["v6"]
+    assert index.segment_ids({"search": "rojas"}) == ["v1"]
+    assert index.segment_ids({"search": "rojas ana"}) == []
+    assert index.segment_ids({"search": "ana.x"}) == ["v6"]
+    assert set(index.segment_ids({"region": "obio"}, contains=True)) == {"v1", "v4"}
+
+
+def test_delta_sync_pages_through_tied_updated_at(monkeypatch, fake_supabase):
+    rows = list(VOLUNTEERS)
+    client = fake_supabase({"volunteers": rows})
+    monkeypatch.setattr(volunteer_index, "supabase", client)
+    monkeypatch.setattr(volunteer_index.settings, "SUPABASE_MAX_ROWS", 2)
+    idx = volunteer_index.VolunteerIndex()
+    idx.rebuild()
+
+    # A bulk write stamps every row with the same updated_at
+    imported = [dict(VOLUNTEERS[1], id=f"w{i}", updated_at="2025-02-01") for i in range(5)]
+    rows.extend(imported)
+    idx.sync()
+
+    assert set(idx.segment_ids({})) == {row["id"] for row in rows}
+
+
+def test_failed_rebuild_is_not_retried_on_every_request(monkeypatch):
+    calls = []
+
+    class Down:
+        def table(self, name):
+            calls.append(name)
+            raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(volunteer_index, "supabase", Down())
+    monkeypatch.setattr(volunteer_index.threading, "Thread", InlineThread)
+    idx = volunteer_index.VolunteerIndex()
+
+    assert idx.ensure_fresh() is False
+    assert idx.ensure_fresh() is False
+    assert idx.segment_ids({}) is None
+    assert calls == ["volunteers"]
+
+
+def test_rebuild_request_reaches_every_worker(monkeypatch, fake_supabase, tmp_path):
+    rows = list(VOLUNTEERS)
+    monkeypatch.setattr(volunteer_index, "supabase", fake_supabase({"volunteers": rows}))
+    monkeypatch.setattr(volunteer_index, "REBUILD_SIGNAL_PATH", str(tmp_path / "signal"))
+    monkeypatch.setattr(volunteer_index.threading, "Thread", InlineThread)
+    workers = [volunteer_index.VolunteerIndex(), volunteer_index.VolunteerIndex()]
+    for idx in workers:
+        idx.ensure_fresh()
+
+    # Deltas would miss a row whose updated_at is older than the watermark
+    rows.append(dict(VOLUNTEERS[1], id="w1", updated_at="2024-01-01"))
+    workers[0].request_rebuild()
+
+    for idx in workers:
+        assert idx.ensure_fresh() is True
+        assert "w1" in idx.segment_ids({})
@@ -0,0 +1,39 @@
+import asyncio
+
+from google.adk.events import Event, EventActions
+
+from app.services.session_store import SqliteSessionService
+
+
+def test_temp_state_is_not_persisted(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    service = SqliteSessionService(path=path)
+
+    async def run():
+        session = await service.create_session(
+            app_name="app", user_id="u", session_id="s", state={"lang": "es", "temp:draft": "x"}
+        )
+        event = Event(author="agent", actions=EventActions(state_delta={"step": 1, "temp:scratch": 2}))
+        await service.append_event(session, event)
+        cached = await service.get_session(app_name="app", user_id="u", session_id="s")
+        stored = await SqliteSessionService(path=path).get_session(app_name="app", user_id="u", session_id="s")
+        return cached, stored
+
+    cached, stored = asyncio.run(run())
+    for session in (cached, stored):
+        assert session.state == {"lang": "es", "step": 1}
+        assert session.events[0].actions.state_delta == {"step": 1}
+
+
+def test_creating_an_existing_session_returns_it(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SqliteSessionService(path=path), SqliteSessionService(path=path)
+
+    async def run():
+        created = await first.create_session(app_name="app", user_id="u", session_id="s", state={"a": 1})
+        again = await second.create_session(app_name="app", user_id="u", session_id="s")
+        return created, again
+
+    created, again = asyncio.run(run())
+    assert again.id == created.id
+    assert again.state == {"a": 1}